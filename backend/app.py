@@ -1,19 +1,35 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import json
 import os
-from flask import Flask, request, jsonify, send_from_directory
-from werkzeug.utils import secure_filename
+import re
+from flask import Flask, Response, request, jsonify, send_from_directory, abort
 from datetime import datetime
 from utils.jwt_manager import decode_token
 
-from mcq_recognition import process_mcq_image
-from database import db
+from mcq_recognition import (
+    process_mcq_image, process_mcq_pages, grade_page, read_page,
+    LOW_MEMORY_MODE
+)
+from utils.artifact_writer import artifact_writer
+from database import db, exam_stats_col
+from utils.exam_stats import record_result_change
+from utils.write_behind import ResultWriteBehind, RESULT_WRITE_BEHIND
+from utils.artifact_store import ArtifactStore, content_hash
+from utils.answer_key_loader import key_hash
+from utils.cache_versions import exam_scope, results_scope
+from utils.compression import init_compression
+from utils.scan_session import check_sheet
+from utils.event_bus import result_delta
+from storage import (
+    artifact_store, versions, scan_sessions, events, STATIC_FOLDER
+)
 
 from routes.auth_routes import auth
 from routes.student_routes import student
 from routes.exam_routes import exam
-from routes.result_routes import result
+from routes.result_routes import result, report_pdf_name, build_report_pdf
 
 from flask_cors import CORS
 
@@ -22,13 +38,12 @@ from flask_cors import CORS
 # =====================================================
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
-STATIC_FOLDER = os.path.join(BASE_DIR, "static")
-
 ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg"}
+BATCH_EXTENSIONS = {"tif", "tiff"}   # multi-page feeder scans
 
 app = Flask(__name__)
 CORS(app)
+init_compression(app)
 
 # =====================================================
 # BLUEPRINTS
@@ -39,23 +54,224 @@ app.register_blueprint(exam, url_prefix="/exam")
 app.register_blueprint(result, url_prefix="/result")
 
 # =====================================================
-# CREATE RUNTIME FOLDERS
+# OPTIONAL WRITE-BEHIND FOR RESULT UPSERTS
 # =====================================================
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(STATIC_FOLDER, exist_ok=True)
+def results_written(docs):
+    """Bumps cache versions and tells live dashboards about new grades."""
+    scopes = set()
+    for d in docs:
+        scopes.add(results_scope(d["teacher_id"]))
+        scopes.add(exam_scope(d["teacher_id"], d["exam_code"]))
+    versions.bump(*sorted(scopes))
+
+    for d in docs:
+        events.publish(
+            exam_scope(d["teacher_id"], d["exam_code"]), "result", result_delta(d)
+        )
+
+
+result_buffer = (
+    ResultWriteBehind(
+        db.results, exam_stats_col, on_flush=results_written
+    )
+    if RESULT_WRITE_BEHIND else None
+)
 
 # =====================================================
 # HELPERS
 # =====================================================
-def allowed_file(filename):
-    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+def allowed_file(filename, extensions=ALLOWED_EXTENSIONS):
+    return "." in filename and filename.rsplit(".", 1)[1].lower() in extensions
+
+
+def store_upload(data, filename, answer_key):
+    """
+    Saves the original under its content hash and picks the annotated
+    page's name from (original, key), so re-uploads and re-grades with an
+    unchanged key reuse both files. Returns (upload_path, annotated_name).
+    """
+    ext = "." + filename.rsplit(".", 1)[1].lower()
+    upload_name = artifact_store.put_bytes("uploads", data, ext, kind="upload")
+
+    annotated_name = ArtifactStore.name_for(
+        "annotated", content_hash(upload_name, key_hash(answer_key)), ext
+    )
+    artifact_store.register(annotated_name, "static", {
+        "kind": "annotated",
+        "upload": upload_name,
+        "answer_key": answer_key
+    })
+    return artifact_store.path("uploads", upload_name), annotated_name
+
+
+def store_batch_upload(data, filename, answer_key):
+    """
+    Like store_upload, for a multi-page scan. Returns (upload_path,
+    annotated_prefix); page n is annotated as <prefix>_p<n>.png.
+    """
+    ext = "." + filename.rsplit(".", 1)[1].lower()
+    upload_name = artifact_store.put_bytes("uploads", data, ext, kind="upload")
+    prefix = "annotated_" + content_hash(upload_name, key_hash(answer_key))
+    return artifact_store.path("uploads", upload_name), prefix
+
+
+def register_page_recipe(upload_path, prefix, page, answer_key):
+    artifact_store.register(f"{prefix}_p{page}.png", "static", {
+        "kind": "annotated",
+        "upload": os.path.basename(upload_path),
+        "page": page - 1,
+        "answer_key": answer_key
+    })
+
+
+def annotate_requested(form):
+    """The form's annotate flag; unset means on, except in low-memory mode."""
+    value = str(form.get("annotate", "")).strip()
+    if not value:
+        return not LOW_MEMORY_MODE
+    return value != "0"
+
+
+def parse_usns(raw):
+    """Ordered USN list from a JSON array or comma/newline separated text."""
+    raw = raw.strip()
+    if raw.startswith("["):
+        try:
+            items = json.loads(raw)
+        except ValueError:
+            return []
+    else:
+        items = re.split(r"[,\s]+", raw)
+    return [str(u).strip().upper() for u in items if str(u).strip()]
+
+
+def request_teacher_id():
+    # 🔐 AUTH – decode ONCE; None when the JWT is missing or invalid
+    token = request.headers.get("Authorization", "").replace("Bearer ", "")
+    try:
+        return decode_token(token)["teacher_id"]
+    except:
+        return None
+
+
+def grade_context(usns, exam_code):
+    """
+    Resolves (teacher_id, exam_code, answer_key) for a grading call:
+    the JWT always names the teacher; exam, key and roster come from the
+    scan session when one is sent, else from the answer key collection.
+    Returns (context, None) or (None, (error, status)).
+    """
+    session_id = (
+        request.headers.get("X-Scan-Session")
+        or request.form.get("session_id", "")
+    ).strip()
+
+    teacher_id = request_teacher_id()
+
+    if session_id:
+        # ✅ SCAN SESSION: exam, key and roster already validated
+        session = scan_sessions.get(session_id)
+        error, status = check_sheet(session, teacher_id, usns, exam_code)
+        if error:
+            return None, (error, status)
+        return (
+            session["teacher_id"], session["exam_code"], session["answer_key"]
+        ), None
+
+    if not exam_code:
+        return None, ("usn and exam_code required", 400)
+    if not teacher_id:
+        return None, ("Unauthorized", 401)
+
+    # ✅ FETCH ANSWER KEY
+    key_doc = db.answer_keys.find_one({"exam_code": exam_code})
+    if not key_doc:
+        return None, ("Answer key not found", 404)
+
+    return (teacher_id, exam_code, key_doc["answer_key"]), None
+
+
+def save_result(final_result):
+    """Stores one graded sheet. Returns (response_body, status)."""
+
+    # ✅ WRITE-BEHIND: reply now, flush in a batch later
+    if result_buffer:
+        token = result_buffer.submit(final_result)
+        return {**final_result, "ack_token": token, "durable": False}, 202
+
+    # ✅ SAVE / UPDATE RESULT (old document comes back for re-grades)
+    previous = db.results.find_one_and_replace(
+        {"usn": final_result["usn"], "exam_code": final_result["exam_code"]},
+        final_result,
+        upsert=True
+    )
+    final_result.pop("_id", None)
+
+    # ✅ KEEP PER-EXAM ANALYTICS AND CACHE VERSIONS IN STEP
+    record_result_change(exam_stats_col, previous, final_result)
+    results_written([final_result])
+    return final_result, 200
+
+
+def regenerate_artifact(filename):
+    """Rebuilds an evicted derived artifact from its recipe, if possible."""
+    recipe = artifact_store.recipe(filename)
+    if not recipe:
+        return False
+
+    if recipe["kind"] == "annotated":
+        upload = recipe["upload"]
+        if not artifact_store.touch("uploads", upload):
+            return False  # original was evicted too
+        path = artifact_store.path("uploads", upload)
+        if "page" in recipe:
+            page = read_page(path, recipe["page"], grayscale=LOW_MEMORY_MODE)
+            if page is None:
+                return False
+            grade_page(
+                page, recipe["answer_key"], annotate=True,
+                annotated_name=filename
+            )
+        else:
+            process_mcq_image(
+                path, recipe["answer_key"], annotate=True,
+                annotated_name=filename
+            )
+        artifact_writer.flush()
+
+    elif recipe["kind"] == "report_pdf":
+        data = db.results.find_one({
+            "usn": recipe["usn"],
+            "exam_code": recipe["exam_code"],
+            "teacher_id": recipe.get("teacher_id")
+        })
+        if not data or report_pdf_name(data) != filename:
+            return False  # result changed since; ask the PDF route instead
+        artifact_store.put_bytes(
+            "static", build_report_pdf(data), ".pdf", name=filename
+        )
+
+    else:
+        return False
+
+    artifact_store.stats["regenerated"] += 1
+    return artifact_store.exists("static", filename)
 
 # =====================================================
 # HEALTH CHECK
 # =====================================================
 @app.get("/health")
 def health():
-    return jsonify({"status": "ok"})
+    status = {
+        "status": "ok",
+        "artifacts": artifact_writer.stats,
+        "artifact_store": artifact_store.stats,
+        "read_cache": versions.stats,
+        "events": {**events.stats, "subscribers": events.subscribers()}
+    }
+    if result_buffer:
+        status["write_behind"] = result_buffer.stats()
+    return jsonify(status)
 
 # =====================================================
 # GRADE EXAM  ✅ (FINAL FIXED VERSION)
@@ -68,33 +284,29 @@ def grade_exam():
     usn = request.form.get("usn", "").strip().upper()
     exam_code = request.form.get("exam_code", "").strip().upper()
 
-    if not usn or not exam_code:
+    if not usn:
         return jsonify({"error": "usn and exam_code required"}), 400
 
-    # 🔐 AUTH – decode ONCE
-    token = request.headers.get("Authorization", "").replace("Bearer ", "")
-    try:
-        decoded = decode_token(token)
-        teacher_id = decoded["teacher_id"]
-    except:
-        return jsonify({"error": "Unauthorized"}), 401
-
-    # ✅ FETCH ANSWER KEY
-    key_doc = db.answer_keys.find_one({"exam_code": exam_code})
-    if not key_doc:
-        return jsonify({"error": "Answer key not found"}), 404
+    ctx, error = grade_context([usn], exam_code)
+    if error:
+        return jsonify({"error": error[0]}), error[1]
+    teacher_id, exam_code, answer_key = ctx
 
     file = request.files["image"]
     if not allowed_file(file.filename):
         return jsonify({"error": "Allowed: png, jpg, jpeg"}), 400
 
-    file_path = os.path.join(UPLOAD_FOLDER, secure_filename(file.filename))
-    file.save(file_path)
+    # ✅ CONTENT-ADDRESSED UPLOAD (NO NAME CLASHES BETWEEN TEACHERS)
+    file_path, annotated_name = store_upload(
+        file.read(), file.filename, answer_key
+    )
 
     # ✅ PROCESS IMAGE (PASS ANSWER KEY DIRECTLY)
     results = process_mcq_image(
         file_path,
-        key_doc["answer_key"]
+        answer_key,
+        annotate=annotate_requested(request.form),
+        annotated_name=annotated_name
     )
 
     if "error" in results:
@@ -109,20 +321,96 @@ def grade_exam():
         "timestamp": datetime.utcnow()
     }
 
-    # ✅ SAVE / UPDATE RESULT
-    db.results.replace_one(
-        {"usn": usn, "exam_code": exam_code},
-        final_result,
-        upsert=True
+    body, status = save_result(final_result)
+    return jsonify(body), status
+
+# =====================================================
+# GRADE MULTI-PAGE SCAN  ✅ (ONE STUDENT PER PAGE, NDJSON)
+# =====================================================
+@app.post("/grade_batch")
+def grade_batch():
+    if "image" not in request.files:
+        return jsonify({"error": "No image file"}), 400
+
+    usns = parse_usns(request.form.get("usns", ""))
+    exam_code = request.form.get("exam_code", "").strip().upper()
+    if not usns:
+        return jsonify({"error": "usns required (one per page, in order)"}), 400
+
+    ctx, error = grade_context(usns, exam_code)
+    if error:
+        return jsonify({"error": error[0]}), error[1]
+    teacher_id, exam_code, answer_key = ctx
+
+    file = request.files["image"]
+    if not allowed_file(file.filename, ALLOWED_EXTENSIONS | BATCH_EXTENSIONS):
+        return jsonify({"error": "Allowed: tif, tiff, png, jpg, jpeg"}), 400
+
+    file_path, prefix = store_batch_upload(
+        file.read(), file.filename, answer_key
     )
+    annotate = annotate_requested(request.form)
+    dumps = app.json.dumps
+
+    def generate():
+        pages = process_mcq_pages(
+            file_path, answer_key, usns,
+            annotate=annotate, annotated_prefix=prefix
+        )
+        for page in pages:
+            if "error" in page:
+                yield dumps(page) + "\n"
+                continue
+
+            if page.get("annotated_image_url"):
+                register_page_recipe(
+                    file_path, prefix, page["page"], answer_key
+                )
+
+            body, status = save_result({
+                **page,
+                "exam_code": exam_code,
+                "teacher_id": teacher_id,
+                "timestamp": datetime.utcnow()
+            })
+            yield dumps(body) + "\n"
+
+    # Each page's line is sent as soon as that page is graded
+    return Response(generate(), mimetype="application/x-ndjson")
+
+# =====================================================
+# WRITE-BEHIND ACKNOWLEDGEMENT
+# =====================================================
+@app.get("/grade/ack/<token>")
+def grade_ack(token):
+    teacher_id = request_teacher_id()
+    if not teacher_id:
+        return jsonify({"error": "Unauthorized"}), 401
 
-    return jsonify(final_result), 200
+    if not result_buffer:
+        return jsonify({"status": "durable"}), 200
+    status = result_buffer.status(token, teacher_id)
+    if status == "unknown":
+        # Not this teacher's, not issued by this worker, or not (yet)
+        # in the database
+        return jsonify({"status": status}), 404
+    return jsonify({"status": status}), 200
 
 # =====================================================
 # STATIC FILES
 # =====================================================
 @app.route("/static/<path:filename>")
 def serve_static(filename):
+    # Bump last-access for LRU; a page still queued for writing is
+    # waited for, and only a missing, unqueued file is rebuilt
+    if not artifact_store.touch("static", filename):
+        path = artifact_store.path("static", filename)
+        written = (
+            artifact_writer.wait_for(path)
+            and artifact_store.touch("static", filename)
+        )
+        if not written and not regenerate_artifact(filename):
+            abort(404)
     return send_from_directory(STATIC_FOLDER, filename)
 
 # =====================================================
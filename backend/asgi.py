@@ -0,0 +1,248 @@
+# backend/asgi.py
+"""
+ASGI entry point for upload-heavy traffic.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 2
+
+The hot scanning routes (/grade and the exists checks) are served natively
+with an async Mongo driver, so a slow mobile upload only costs an idle
+coroutine. CPU-bound process_mcq_image runs in a bounded thread pool.
+Every other route is the existing Flask app, mounted as WSGI.
+"""
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+
+from a2wsgi import WSGIMiddleware
+from motor.motor_asyncio import AsyncIOMotorClient
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route
+from werkzeug.http import http_date
+
+from app import (
+    app as flask_app, allowed_file, annotate_requested, result_buffer,
+    store_upload, results_written
+)
+from database import MONGO_URI
+from mcq_recognition import process_mcq_image
+from storage import scan_sessions
+from utils.exam_stats import stats_updates
+from utils.scan_session import check_sheet
+from utils.jwt_manager import decode_token
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+GRADE_EXECUTOR_WORKERS = int(os.getenv("GRADE_EXECUTOR_WORKERS", "2"))
+# Sheets allowed to wait for the executor before we answer 503
+GRADE_MAX_QUEUED = int(os.getenv("GRADE_MAX_QUEUED", "16"))
+
+grade_executor = ThreadPoolExecutor(
+    max_workers=GRADE_EXECUTOR_WORKERS, thread_name_prefix="grade"
+)
+grade_slots = None
+mongo = None
+adb = None
+
+
+# =====================================================
+# HELPERS
+# =====================================================
+class FlaskJSONResponse(JSONResponse):
+    # Same datetime format as Flask's jsonify
+    def render(self, content):
+        return json.dumps(
+            content, default=_json_default, separators=(",", ":")
+        ).encode("utf-8")
+
+
+def _json_default(o):
+    if isinstance(o, datetime):
+        return http_date(o)
+    return str(o)
+
+
+def teacher_from(request):
+    token = request.headers.get("Authorization", "").replace("Bearer ", "")
+    try:
+        return decode_token(token)["teacher_id"]
+    except Exception:
+        return None
+
+
+# =====================================================
+# LIFESPAN – ASYNC MONGO CLIENT PER WORKER
+# =====================================================
+@asynccontextmanager
+async def lifespan(app):
+    global mongo, adb, grade_slots
+    mongo = AsyncIOMotorClient(MONGO_URI)
+    adb = mongo["mcq_grading_db"]
+    grade_slots = asyncio.Semaphore(GRADE_EXECUTOR_WORKERS + GRADE_MAX_QUEUED)
+    try:
+        yield
+    finally:
+        mongo.close()
+        grade_executor.shutdown(wait=True)
+        if result_buffer:
+            result_buffer.flush()
+
+
+# =====================================================
+# ROUTES
+# =====================================================
+async def health(request):
+    return FlaskJSONResponse({"status": "ok", "server": "asgi"})
+
+
+async def grade_exam(request):
+    form = await request.form()
+    upload = form.get("image")
+    if upload is None or isinstance(upload, str):
+        return FlaskJSONResponse({"error": "No image file"}, 400)
+
+    usn = str(form.get("usn", "")).strip().upper()
+    exam_code = str(form.get("exam_code", "")).strip().upper()
+    session_id = str(
+        request.headers.get("X-Scan-Session") or form.get("session_id", "")
+    ).strip()
+
+    if not usn:
+        return FlaskJSONResponse({"error": "usn and exam_code required"}, 400)
+
+    if session_id:
+        session = scan_sessions.peek(session_id)
+        if session is None:
+            session = await asyncio.get_running_loop().run_in_executor(
+                None, scan_sessions.get, session_id
+            )
+        error, status = check_sheet(
+            session, teacher_from(request), [usn], exam_code
+        )
+        if error:
+            return FlaskJSONResponse({"error": error}, status)
+        teacher_id = session["teacher_id"]
+        exam_code = session["exam_code"]
+        key_doc = {"answer_key": session["answer_key"]}
+    else:
+        if not exam_code:
+            return FlaskJSONResponse(
+                {"error": "usn and exam_code required"}, 400
+            )
+
+        teacher_id = teacher_from(request)
+        if not teacher_id:
+            return FlaskJSONResponse({"error": "Unauthorized"}, 401)
+
+        key_doc = await adb.answer_keys.find_one({"exam_code": exam_code})
+        if not key_doc:
+            return FlaskJSONResponse({"error": "Answer key not found"}, 404)
+
+    if not allowed_file(upload.filename or ""):
+        return FlaskJSONResponse({"error": "Allowed: png, jpg, jpeg"}, 400)
+
+    if grade_slots.locked():
+        return FlaskJSONResponse({"error": "Grading queue is full"}, 503)
+
+    loop = asyncio.get_running_loop()
+    async with grade_slots:
+        data = await upload.read()
+        file_path, annotated_name = await loop.run_in_executor(
+            None, store_upload, data, upload.filename, key_doc["answer_key"]
+        )
+        del data
+
+        results = await loop.run_in_executor(
+            grade_executor, partial(
+                process_mcq_image, file_path, key_doc["answer_key"],
+                annotate=annotate_requested(form),
+                annotated_name=annotated_name
+            )
+        )
+
+    if "error" in results:
+        return FlaskJSONResponse(results, 400)
+
+    final_result = {
+        **results,
+        "usn": usn,
+        "exam_code": exam_code,
+        "teacher_id": teacher_id,
+        "timestamp": datetime.utcnow()
+    }
+
+    if result_buffer:
+        token = result_buffer.submit(final_result)
+        return FlaskJSONResponse(
+            {**final_result, "ack_token": token, "durable": False}, 202
+        )
+
+    previous = await adb.results.find_one_and_replace(
+        {"usn": usn, "exam_code": exam_code},
+        final_result,
+        upsert=True
+    )
+    final_result.pop("_id", None)
+
+    for flt, update in stats_updates(previous, final_result):
+        await adb.exam_stats.update_one(flt, update, upsert=True)
+    await loop.run_in_executor(None, results_written, [final_result])
+
+    return FlaskJSONResponse(final_result, 200)
+
+
+async def student_exists(request):
+    teacher_id = teacher_from(request)
+    if not teacher_id:
+        return FlaskJSONResponse({"exists": False}, 401)
+
+    usn = request.path_params["usn"].strip().upper()
+    found = await adb.students.find_one(
+        {"usn": usn, "teacher_id": teacher_id}, {"_id": 1}
+    )
+    if not found:
+        return FlaskJSONResponse({"exists": False}, 404)
+    return FlaskJSONResponse({"exists": True}, 200)
+
+
+async def exam_exists(request):
+    teacher_id = teacher_from(request)
+    if not teacher_id:
+        return FlaskJSONResponse({"exists": False}, 401)
+
+    exam_code = request.path_params["exam_code"].strip().upper()
+    found = await adb.exams.find_one(
+        {"exam_code": exam_code, "teacher_id": teacher_id}, {"_id": 1}
+    )
+    if not found:
+        return FlaskJSONResponse({"exists": False}, 404)
+    return FlaskJSONResponse({"exists": True}, 200)
+
+
+# =====================================================
+# APP
+# =====================================================
+app = Starlette(
+    routes=[
+        Route("/health", health, methods=["GET"]),
+        Route("/grade", grade_exam, methods=["POST"]),
+        Route("/student/exists/{usn}", student_exists, methods=["GET"]),
+        Route("/exam/exists/{exam_code}", exam_exists, methods=["GET"]),
+        # Everything else: the existing blueprints, unchanged
+        Mount("/", app=WSGIMiddleware(flask_app)),
+    ],
+    middleware=[
+        Middleware(
+            CORSMiddleware, allow_origins=["*"],
+            allow_methods=["*"], allow_headers=["*"]
+        ),
+    ],
+    lifespan=lifespan,
+)
@@ -0,0 +1,75 @@
+# backend/benchmarks/bench_bands.py
+"""
+Single-sheet latency with the page split into 1..N horizontal bands
+(MCQ_PARALLEL_BANDS), and a check that every band count grades the
+same as the serial path.
+
+    python benchmarks/bench_bands.py --bands 1 2 4 8 --megapixels 2 8
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2  # noqa: E402
+import mcq_recognition  # noqa: E402
+from benchmarks.synthetic_sheets import make_sheet  # noqa: E402
+
+
+def latency(path, key, bands, repeat, low_memory):
+    mcq_recognition.process_mcq_image(
+        path, key, low_memory, annotate=False, bands=bands
+    )
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        mcq_recognition.process_mcq_image(
+            path, key, low_memory, annotate=False, bands=bands
+        )
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bands", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--megapixels", type=float, nargs="+", default=[2, 8])
+    parser.add_argument("--questions", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--low-memory", action="store_true")
+    args = parser.parse_args()
+
+    mcq_recognition.load_models()
+    print(f"cpus={os.cpu_count()}")
+    print(f"{'MP':>5} {'bands':>6} {'median':>9} {'speedup':>8} {'same':>5}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mp in args.megapixels:
+            width = int((mp * 1e6 / 1.414) ** 0.5)
+            height = int(width * 1.414)
+            page, key, _ = make_sheet(
+                args.questions, width=width, height=height
+            )
+            path = os.path.join(tmp, f"page_{mp}.png")
+            cv2.imwrite(path, page)
+
+            serial = mcq_recognition.process_mcq_image(
+                path, key, args.low_memory, annotate=False, bands=1
+            )
+            base = None
+            for bands in args.bands:
+                out = mcq_recognition.process_mcq_image(
+                    path, key, args.low_memory, annotate=False, bands=bands
+                )
+                t = latency(path, key, bands, args.repeat, args.low_memory)
+                base = base or t
+                print(f"{mp:>5} {bands:>6} {t * 1000:>7.1f}ms "
+                      f"{base / t:>7.2f}x {str(out == serial):>5}")
+
+
+if __name__ == "__main__":
+    main()
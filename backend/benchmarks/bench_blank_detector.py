@@ -0,0 +1,72 @@
+# backend/benchmarks/bench_blank_detector.py
+"""
+How many letter-CNN calls the blank-option detector saves, and whether it
+changes any grades on written rows.
+
+    python benchmarks/bench_blank_detector.py --sheets 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mcq_recognition  # noqa: E402
+from benchmarks.synthetic_sheets import write_sheets  # noqa: E402
+
+
+def run(sheets, detector_on):
+    mcq_recognition.BLANK_DETECTOR_ENABLED = detector_on
+    for k in mcq_recognition.PREDICT_STATS:
+        mcq_recognition.PREDICT_STATS[k] = 0
+
+    grades = {}
+    start = time.perf_counter()
+    for path, key, _ in sheets:
+        out = mcq_recognition.process_mcq_image(path, key)
+        for r in out.get("results", []):
+            grades[(path, r["question_pred"])] = r["result"]
+    elapsed = time.perf_counter() - start
+
+    return grades, dict(mcq_recognition.PREDICT_STATS), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sheets", type=int, default=10)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--blank-ratio", type=float, default=0.25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sheets = write_sheets(
+            tmp, count=args.sheets,
+            n_questions=args.questions, blank_ratio=args.blank_ratio
+        )
+        truth = {
+            (path, q): letter
+            for path, _, t in sheets for q, letter in t.items()
+        }
+
+        base, base_stats, base_t = run(sheets, detector_on=False)
+        fast, fast_stats, fast_t = run(sheets, detector_on=True)
+
+    written = [k for k in base if truth.get(k)]
+    blanks = [k for k in fast if truth.get(k) == ""]
+    changed = [k for k in written if base[k] != fast.get(k)]
+    blank_hits = [k for k in blanks if fast[k] == "NotAttempted"]
+
+    saved = base_stats["letters_predicted"] - fast_stats["letters_predicted"]
+    print(f"sheets={args.sheets} questions={args.questions}")
+    print(f"letter predicts  baseline={base_stats['letters_predicted']} "
+          f"detector={fast_stats['letters_predicted']} saved={saved}")
+    print(f"time             baseline={base_t:.2f}s detector={fast_t:.2f}s")
+    print(f"written rows     {len(written)} changed grades={len(changed)}")
+    print(f"blank rows       {len(blanks)} marked NotAttempted="
+          f"{len(blank_hits)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# backend/benchmarks/bench_item_analysis.py
+"""
+Item analysis in one Mongo aggregation vs. pulling every result into a
+Python loop. Uses a scratch collection on MONGO_URI and drops it after.
+
+    python benchmarks/bench_item_analysis.py --students 1000 --questions 40
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv  # noqa: E402
+load_dotenv()
+
+from database import db  # noqa: E402
+from utils.item_analysis import (  # noqa: E402
+    item_analysis, item_analysis_python
+)
+
+LETTERS = ["A", "B", "C", "D"]
+
+
+def make_results(students, questions, seed=0):
+    rng = random.Random(seed)
+    key = {str(q): rng.choice(LETTERS) for q in range(1, questions + 1)}
+    docs = []
+    for i in range(students):
+        ability = rng.random()
+        rows, score = [], 0
+        for q, answer in key.items():
+            if rng.random() < 0.05:
+                rows.append({"question_pred": q, "option_pred": "",
+                             "result": "NotAttempted"})
+                continue
+            opt = answer if rng.random() < ability else rng.choice(LETTERS)
+            ok = opt == answer
+            score += ok
+            rows.append({"question_pred": q, "option_pred": opt,
+                         "result": "Correct" if ok else "Wrong"})
+        docs.append({
+            "usn": f"BENCH{i:05d}", "exam_code": "BENCH01",
+            "teacher_id": "bench", "score": score, "total": questions,
+            "results": rows,
+        })
+    return docs
+
+
+def timed(fn, repeat):
+    best, out = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return out, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--questions", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    col = db["bench_item_analysis_results"]
+    col.drop()
+    col.insert_many(make_results(args.students, args.questions))
+    col.create_index([("teacher_id", 1), ("exam_code", 1)])
+    query = {"exam_code": "BENCH01", "teacher_id": "bench"}
+
+    try:
+        agg, agg_t = timed(lambda: item_analysis(col, query), args.repeat)
+        py, py_t = timed(lambda: item_analysis_python(col, query), args.repeat)
+    finally:
+        col.drop()
+
+    print(f"students={args.students} questions={args.questions}")
+    print(f"aggregation  {agg_t * 1000:8.1f} ms")
+    print(f"python loop  {py_t * 1000:8.1f} ms")
+    print(f"speedup      {py_t / agg_t:8.2f}x")
+    print(f"same output  {agg == py}")
+
+
+if __name__ == "__main__":
+    main()
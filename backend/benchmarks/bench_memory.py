@@ -0,0 +1,120 @@
+# backend/benchmarks/bench_memory.py
+"""
+Peak memory per page, default vs. low-memory mode, at several page sizes.
+Each run happens in its own subprocess so peak RSS is not shared.
+"page RSS peak" is the measured page alone: the kernel's peak-RSS mark
+is reset (/proc/self/clear_refs) after model load and warm-up, so it is
+not the process's lifetime peak, which is shown separately.
+
+    python benchmarks/bench_memory.py --megapixels 2 8 24
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def status_mb(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024.0
+    return 0.0
+
+
+def reset_peak_rss():
+    """Restart VmHWM from the current RSS (Linux 4.0+). False if unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def child(path, low_memory, annotate):
+    import mcq_recognition
+
+    mcq_recognition.load_models()
+    with open(path + ".key") as f:
+        key = json.load(f)
+
+    # Warm-up so model graphs and work buffers exist before measuring
+    mcq_recognition.process_mcq_image(path, key, low_memory, annotate)
+
+    lifetime_peak = status_mb("VmHWM")
+    base_rss = status_mb("VmRSS")
+    reset = reset_peak_rss()
+    tracemalloc.start()
+    mcq_recognition.process_mcq_image(path, key, low_memory, annotate)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    page_peak = None
+    if reset:
+        page_peak = round(max(0.0, status_mb("VmHWM") - base_rss), 1)
+
+    print(json.dumps({
+        "traced_peak_mb": round(peak / 2 ** 20, 1),
+        "page_rss_peak_mb": page_peak,
+        "process_peak_mb": round(max(lifetime_peak, status_mb("VmHWM")), 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--megapixels", type=float, nargs="+",
+                        default=[2, 8, 24])
+    parser.add_argument("--no-annotate", action="store_true")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        path, low, annotate = args.child
+        child(path, low == "1", None if annotate == "-" else annotate == "1")
+        return
+
+    import cv2
+    from benchmarks.synthetic_sheets import make_sheet
+
+    # "-" leaves annotate at the server default (off in low-memory mode)
+    annotate = "0" if args.no_annotate else "-"
+    print(f"{'MP':>5} {'mode':>8} {'traced peak':>12} "
+          f"{'page RSS peak':>14} {'process peak':>13}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mp in args.megapixels:
+            # A4 aspect ratio
+            width = int((mp * 1e6 / 1.414) ** 0.5)
+            height = int(width * 1.414)
+            page, key, _ = make_sheet(width=width, height=height)
+            path = os.path.join(tmp, f"page_{mp}.png")
+            cv2.imwrite(path, page)
+            with open(path + ".key", "w") as f:
+                json.dump(key, f)
+            del page
+
+            for low in ("0", "1"):
+                out = subprocess.run(
+                    [sys.executable, __file__, "--child", path, low, annotate],
+                    capture_output=True, text=True, cwd=BACKEND_DIR
+                )
+                lines = out.stdout.strip().splitlines()
+                if out.returncode != 0 or not lines:
+                    print(f"{mp:>5} failed: {out.stderr.strip()[-200:]}")
+                    continue
+                r = json.loads(lines[-1])
+                mode = "low-mem" if low == "1" else "default"
+                page = r["page_rss_peak_mb"]
+                page = "n/a" if page is None else f"{page:.1f}MB"
+                print(f"{mp:>5} {mode:>8} {r['traced_peak_mb']:>10.1f}MB "
+                      f"{page:>14} {r['process_peak_mb']:>11.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
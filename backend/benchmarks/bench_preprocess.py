@@ -0,0 +1,115 @@
+# backend/benchmarks/bench_preprocess.py
+"""
+Per-character cost of preparing CNN input: one preprocess_char_for_model
+call per crop vs. preprocess_chars_batch into the reused page buffer.
+With --predict, also one predict per character vs. one per page.
+
+    python benchmarks/bench_preprocess.py --sheets 5 --repeat 20 --predict
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2  # noqa: E402
+import mcq_recognition  # noqa: E402
+from benchmarks.synthetic_sheets import make_sheet  # noqa: E402
+
+
+def page_crops(n_sheets, n_questions):
+    """Character-sized crops cut the way process_mcq_image cuts them."""
+    pages = []
+    for seed in range(n_sheets):
+        page, _, _ = make_sheet(n_questions, blank_ratio=0.0, seed=seed)
+        gray = cv2.cvtColor(page, cv2.COLOR_BGR2GRAY)
+        H, W = gray.shape
+        min_w, min_h = max(8, W // 150), max(12, H // 60)
+
+        crops = []
+        for c in mcq_recognition._segment(gray):
+            x, y, w, h = cv2.boundingRect(c)
+            if w >= min_w and h >= min_h:
+                crops.append(gray[y:y + h, x:x + w])
+        pages.append(crops)
+    return pages
+
+
+def per_char(pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for crops in pages:
+            for crop in crops:
+                mcq_recognition.preprocess_char_for_model(crop)
+    return time.perf_counter() - start
+
+
+def batched(pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for crops in pages:
+            mcq_recognition.preprocess_chars_batch(crops)
+    return time.perf_counter() - start
+
+
+def predict_per_char(model, pages):
+    start = time.perf_counter()
+    for crops in pages:
+        for crop in crops:
+            prepared, _ = mcq_recognition.preprocess_char_for_model(crop)
+            model.predict(prepared, verbose=0)
+    return time.perf_counter() - start
+
+
+def predict_batched(model, pages):
+    start = time.perf_counter()
+    for crops in pages:
+        batch, _ = mcq_recognition.preprocess_chars_batch(crops)
+        model.predict(batch, verbose=0)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sheets", type=int, default=5)
+    parser.add_argument("--questions", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--predict", action="store_true",
+                        help="also time the digit CNN (loads the models)")
+    args = parser.parse_args()
+
+    pages = page_crops(args.sheets, args.questions)
+    n_chars = sum(len(c) for c in pages)
+    print(f"{args.sheets} pages, {n_chars} crops")
+
+    # Same input to the CNN either way
+    for crops in pages:
+        batch, canvases = mcq_recognition.preprocess_chars_batch(crops)
+        for i, crop in enumerate(crops):
+            one, canvas = mcq_recognition.preprocess_char_for_model(crop)
+            assert np.array_equal(one[0], batch[i])
+            assert np.array_equal(canvas, canvases[i])
+
+    batched(pages, 1)  # allocate the batch buffer before timing
+    total = n_chars * args.repeat
+    t_old = per_char(pages, args.repeat)
+    t_new = batched(pages, args.repeat)
+    print(f"{'preprocess':<12} per-char {t_old / total * 1e6:8.1f}us  "
+          f"batched {t_new / total * 1e6:8.1f}us  "
+          f"({t_old / t_new:.1f}x)")
+
+    if args.predict:
+        mcq_recognition.load_models()
+        model = mcq_recognition.digits_model
+        t_old = predict_per_char(model, pages)
+        t_new = predict_batched(model, pages)
+        print(f"{'+ predict':<12} per-char {t_old / n_chars * 1e6:8.1f}us  "
+              f"batched {t_new / n_chars * 1e6:8.1f}us  "
+              f"({t_old / t_new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# backend/benchmarks/bench_rescore.py
+"""
+Time the NumPy re-score of stored recognitions, and optionally the full
+read + bulk_write round trip against a scratch collection on MONGO_URI.
+
+    python benchmarks/bench_rescore.py --students 200 --questions 60 [--mongo]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.rescore import score_matrix  # noqa: E402
+
+LETTERS = ["A", "B", "C", "D"]
+
+
+def make_docs(students, questions, seed=0):
+    rng = random.Random(seed)
+    docs = []
+    for i in range(students):
+        recognitions = [{
+            "question_pred": str(q),
+            "question_conf": 0.99,
+            "option_pred": rng.choice(LETTERS + [""]),
+            "option_conf": 0.9,
+        } for q in range(1, questions + 1)]
+        docs.append({
+            "_id": i, "usn": f"BENCH{i:05d}", "exam_code": "BENCH01",
+            "teacher_id": "bench", "score": 0, "total": questions,
+            "results": [], "recognitions": recognitions,
+        })
+    return docs, rng
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--questions", type=int, default=60)
+    parser.add_argument("--mongo", action="store_true")
+    args = parser.parse_args()
+
+    docs, rng = make_docs(args.students, args.questions)
+    new_key = {
+        str(q): rng.choice(LETTERS) for q in range(1, args.questions + 1)
+    }
+
+    start = time.perf_counter()
+    updates = score_matrix(docs, new_key)
+    elapsed = time.perf_counter() - start
+    print(f"students={args.students} questions={args.questions}")
+    print(f"numpy re-score  {elapsed * 1000:8.1f} ms ({len(updates)} docs)")
+
+    if not args.mongo:
+        return
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    from database import db
+    from utils.rescore import rescore_exam
+
+    col = db["bench_rescore_results"]
+    stats = db["bench_rescore_stats"]
+    col.drop()
+    stats.drop()
+    col.insert_many([{k: v for k, v in d.items() if k != "_id"} for d in docs])
+    try:
+        start = time.perf_counter()
+        rescore_exam(col, stats, "BENCH01", "bench", new_key)
+        elapsed = time.perf_counter() - start
+    finally:
+        col.drop()
+        stats.drop()
+    print(f"end-to-end      {elapsed * 1000:8.1f} ms (read + bulk_write + stats)")
+
+
+if __name__ == "__main__":
+    main()
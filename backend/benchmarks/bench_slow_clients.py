@@ -0,0 +1,137 @@
+# backend/benchmarks/bench_slow_clients.py
+"""
+Slow mobile uploads against a running server, while a fast client keeps
+polling /health. Run it once against each serving mode, e.g.
+
+    gunicorn -w 4 -b :5000 app:app
+    uvicorn asgi:app --port 5001 --workers 4
+
+    python benchmarks/bench_slow_clients.py --url http://127.0.0.1:5000 \
+        --image sheet.png --exam-code JAVA01 --usn 1AB21CS001 --token <jwt>
+
+Each slow client trickles its multipart body in small chunks with a
+delay, the way a weak mobile link does.
+"""
+import argparse
+import http.client
+import statistics
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+
+def multipart_body(fields, image_path):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f"--{boundary}\r\nContent-Disposition: form-data; "
+            f"name=\"{name}\"\r\n\r\n{value}\r\n".encode()
+        )
+    with open(image_path, "rb") as f:
+        data = f.read()
+    parts.append(
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"image\"; "
+        f"filename=\"bench_{uuid.uuid4().hex[:8]}.png\"\r\n"
+        f"Content-Type: image/png\r\n\r\n".encode() + data + b"\r\n"
+    )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return boundary, b"".join(parts)
+
+
+def slow_upload(url, args, chunk, delay, out):
+    u = urlparse(url)
+    boundary, body = multipart_body(
+        {"usn": args.usn, "exam_code": args.exam_code}, args.image
+    )
+    start = time.perf_counter()
+    status = None
+    try:
+        conn = http.client.HTTPConnection(u.hostname, u.port, timeout=300)
+        conn.putrequest("POST", "/grade")
+        conn.putheader("Content-Type", f"multipart/form-data; boundary={boundary}")
+        conn.putheader("Content-Length", str(len(body)))
+        conn.putheader("Authorization", f"Bearer {args.token}")
+        conn.endheaders()
+        for i in range(0, len(body), chunk):
+            conn.send(body[i:i + chunk])
+            time.sleep(delay)
+        status = conn.getresponse().status
+        conn.close()
+    except Exception as e:
+        status = f"error: {e}"
+    out.append((time.perf_counter() - start, status))
+
+
+def poll_health(url, stop, out):
+    u = urlparse(url)
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection(u.hostname, u.port, timeout=60)
+            conn.request("GET", "/health")
+            conn.getresponse().read()
+            conn.close()
+            out.append(time.perf_counter() - start)
+        except Exception:
+            out.append(float("inf"))
+        time.sleep(0.1)
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", required=True)
+    parser.add_argument("--image", required=True)
+    parser.add_argument("--usn", required=True)
+    parser.add_argument("--exam-code", required=True)
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--chunk", type=int, default=16 * 1024)
+    parser.add_argument("--delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    uploads, health = [], []
+    stop = threading.Event()
+    poller = threading.Thread(target=poll_health, args=(args.url, stop, health))
+    poller.start()
+
+    start = time.perf_counter()
+    threads = [
+        threading.Thread(
+            target=slow_upload,
+            args=(args.url, args, args.chunk, args.delay, uploads)
+        )
+        for _ in range(args.clients)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    stop.set()
+    poller.join()
+
+    times = [t for t, _ in uploads]
+    statuses = {}
+    for _, s in uploads:
+        statuses[s] = statuses.get(s, 0) + 1
+
+    print(f"url={args.url} clients={args.clients}")
+    print(f"wall time         {wall:8.2f} s")
+    print(f"upload latency    p50={pct(times, 0.5):.2f}s "
+          f"p95={pct(times, 0.95):.2f}s max={max(times):.2f}s")
+    print(f"statuses          {statuses}")
+    if health:
+        print(f"/health latency   p50={pct(health, 0.5) * 1000:.1f}ms "
+              f"p95={pct(health, 0.95) * 1000:.1f}ms "
+              f"mean={statistics.mean(h for h in health if h != float('inf')) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# backend/benchmarks/bench_thread_matrix.py
+"""
+Throughput of processes x threads x TF intra-op threads, to find the
+best worker layout for this machine's core count.
+
+    python benchmarks/bench_thread_matrix.py --processes 1 2 4 \
+        --threads 1 2 4 --intra 1 2 4 --sheets 8
+
+Each "process" is a fresh interpreter (like a gunicorn worker) running
+`threads` grading threads over the same synthetic sheets.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def worker(sheet_dir, threads, sheets):
+    import mcq_recognition
+
+    mcq_recognition.load_models()
+    paths = sorted(
+        os.path.join(sheet_dir, n) for n in os.listdir(sheet_dir)
+        if n.endswith(".png")
+    )
+    with open(os.path.join(sheet_dir, "keys.json")) as f:
+        keys = json.load(f)
+
+    jobs = [paths[i % len(paths)] for i in range(sheets)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(
+            lambda p: mcq_recognition.process_mcq_image(
+                p, keys[os.path.basename(p)], annotate=False
+            ),
+            jobs
+        ))
+    print(json.dumps({"sheets": sheets, "seconds": time.perf_counter() - start}))
+
+
+def run_layout(sheet_dir, processes, threads, intra, sheets):
+    env = {
+        **os.environ,
+        "TF_INTRA_OP_THREADS": str(intra),
+        "TF_INTER_OP_THREADS": "1",
+        "CV_THREADS": str(intra),
+        "CPU_AFFINITY": "auto",
+        "WEB_CONCURRENCY": str(processes),
+        "TF_CPP_MIN_LOG_LEVEL": "3",
+    }
+    procs = []
+    start = time.perf_counter()
+    for i in range(processes):
+        procs.append(subprocess.Popen(
+            [sys.executable, __file__, "--worker", sheet_dir,
+             str(threads), str(sheets)],
+            env={**env, "WORKER_INDEX": str(i)},
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, cwd=BACKEND_DIR
+        ))
+    done = 0
+    grading = 0.0
+    for p in procs:
+        out, _ = p.communicate()
+        r = json.loads(out.strip().splitlines()[-1])
+        done += r["sheets"]
+        grading = max(grading, r["seconds"])
+    wall = time.perf_counter() - start
+    # Throughput over the grading phase only (model load excluded)
+    return done / grading if grading else 0.0, wall
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--intra", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--sheets", type=int, default=8,
+                        help="sheets graded per process")
+    parser.add_argument("--worker", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        sheet_dir, threads, sheets = args.worker
+        worker(sheet_dir, int(threads), int(sheets))
+        return
+
+    import cv2
+    from benchmarks.synthetic_sheets import make_sheet
+
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") \
+        else os.cpu_count()
+    print(f"cores={cores}")
+    print(f"{'procs':>5} {'threads':>7} {'intra':>5} {'sheets/s':>9}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        keys = {}
+        for i in range(4):
+            page, key, _ = make_sheet(seed=i)
+            name = f"sheet_{i}.png"
+            cv2.imwrite(os.path.join(tmp, name), page)
+            keys[name] = key
+        with open(os.path.join(tmp, "keys.json"), "w") as f:
+            json.dump(keys, f)
+
+        for p in args.processes:
+            for t in args.threads:
+                for intra in args.intra:
+                    rate, _ = run_layout(tmp, p, t, intra, args.sheets)
+                    results.append((rate, p, t, intra))
+                    print(f"{p:>5} {t:>7} {intra:>5} {rate:>9.2f}")
+
+    rate, p, t, intra = max(results)
+    print(f"\nbest: WEB_CONCURRENCY={p} GUNICORN_THREADS={t} "
+          f"TF_INTRA_OP_THREADS={intra} ({rate:.2f} sheets/s)")
+
+
+if __name__ == "__main__":
+    main()
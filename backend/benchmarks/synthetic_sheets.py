@@ -0,0 +1,60 @@
+# backend/benchmarks/synthetic_sheets.py
+"""
+Synthetic answer sheets for the benchmarks.
+
+Pages follow the real layout: question numbers in a left column and the
+chosen option letter in a right column. Some rows are left blank (only an
+empty printed option box), which is what NotAttempted looks like on paper.
+"""
+import os
+import random
+
+import cv2
+import numpy as np
+
+LETTERS = ["A", "B", "C", "D"]
+
+
+def make_sheet(n_questions=20, blank_ratio=0.2, width=1240, height=1754,
+               seed=0):
+    rng = random.Random(seed)
+
+    page = np.full((height, width, 3), 255, dtype=np.uint8)
+    answer_key, truth = {}, {}
+
+    row_h = (height - 200) // max(1, n_questions)
+    for q in range(1, n_questions + 1):
+        y = 120 + (q - 1) * row_h + row_h // 2
+        answer_key[str(q)] = rng.choice(LETTERS)
+
+        cv2.putText(
+            page, str(q), (int(width * 0.12), y + 20),
+            cv2.FONT_HERSHEY_SIMPLEX, 1.8, (20, 20, 20), 4
+        )
+
+        ox = int(width * 0.6)
+        if rng.random() < blank_ratio:
+            cv2.rectangle(
+                page, (ox - 10, y - 35), (ox + 55, y + 35), (40, 40, 40), 2
+            )
+            truth[str(q)] = ""
+        else:
+            letter = rng.choice(LETTERS)
+            cv2.putText(
+                page, letter, (ox, y + 20),
+                cv2.FONT_HERSHEY_SIMPLEX, 1.8, (20, 20, 20), 4
+            )
+            truth[str(q)] = letter
+
+    return page, answer_key, truth
+
+
+def write_sheets(out_dir, count=10, **kwargs):
+    os.makedirs(out_dir, exist_ok=True)
+    sheets = []
+    for i in range(count):
+        page, key, truth = make_sheet(seed=i, **kwargs)
+        path = os.path.join(out_dir, f"synthetic_{i:03d}.png")
+        cv2.imwrite(path, page)
+        sheets.append((path, key, truth))
+    return sheets
@@ -1,5 +1,6 @@
 # backend/database.py
 from pymongo import MongoClient
+from pymongo.errors import OperationFailure
 import os
 
 MONGO_URI = os.getenv("MONGO_URI")
@@ -17,3 +18,27 @@ students_col = db["students"]
 exams_col = db["exams"]
 results_col = db["results"]
 answer_keys_col = db["answer_keys"]
+exam_stats_col = db["exam_stats"]    # incremental per-exam analytics
+scan_sessions_col = db["scan_sessions"]  # short-lived /grade preflights
+
+# INDEXES (keyset pagination walks _id within a teacher's documents)
+results_col.create_index([("teacher_id", 1), ("_id", 1)])
+results_col.create_index([("teacher_id", 1), ("usn", 1), ("_id", 1)])
+results_col.create_index([("teacher_id", 1), ("exam_code", 1), ("_id", 1)])
+students_col.create_index([("teacher_id", 1), ("_id", 1)])
+exam_stats_col.create_index([("teacher_id", 1), ("exam_code", 1)], unique=True)
+scan_sessions_col.create_index("expires_at", expireAfterSeconds=0)
+scan_sessions_col.create_index([("teacher_id", 1), ("exam_code", 1)])
+
+# One roster entry per (usn, teacher). Bulk imports rely on this for
+# duplicates and fall back to a lookup per chunk when it is missing
+# (typically because the collection already holds duplicate USNs).
+try:
+    students_col.create_index(
+        [("usn", 1), ("teacher_id", 1)], unique=True, name="usn_teacher_unique"
+    )
+except OperationFailure as e:
+    print(
+        "WARNING: unique (usn, teacher_id) index on students is missing; "
+        f"remove duplicate students and restart. {e}"
+    )
@@ -0,0 +1,50 @@
+# backend/gunicorn.conf.py
+# Picked up automatically by `gunicorn app:app` from this directory.
+#
+# Default: sync workers, one request at a time per worker, so a worker
+# never runs more than one process_mcq_image (page buffers, TF predict).
+#
+# Live results (/result/stream, Server-Sent Events) are opt-in with
+# SSE_ENABLED=1 and need threads: each open stream holds one for as
+# long as the dashboard is open, and a sync worker would be blocked by
+# it and killed at `timeout`. With SSE on, workers become gthread with
+# GUNICORN_THREADS (at least SSE_MIN_THREADS) threads, half of which
+# may hold streams. The other threads can all grade at once, so size
+# the memory for that (or set MCQ_LOW_MEMORY=1). The SSE ping
+# (< timeout / 4) keeps proxies from closing idle streams.
+# Alternatively serve the app with asgi.py under uvicorn.
+import os
+
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+threads = int(os.getenv("GUNICORN_THREADS", "1"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+SSE_ENABLED = os.getenv("SSE_ENABLED", "0") == "1"
+if SSE_ENABLED:
+    threads = max(threads, int(os.getenv("SSE_MIN_THREADS", "8")))
+    # Leave at least half the threads for /grade and the other routes
+    os.environ.setdefault("SSE_MAX_STREAMS", str(max(1, threads // 2)))
+os.environ.setdefault("GUNICORN_TIMEOUT", str(timeout))
+
+worker_class = "gthread" if threads > 1 else "sync"
+
+
+def pre_fork(server, worker):
+    # Slot used by CPU_AFFINITY=auto to give each worker its own cores.
+    # Runs in the master: take the lowest slot no live worker holds, so
+    # a replacement gets the cores of the worker that died.
+    used = {getattr(w, "slot", None) for w in server.WORKERS.values()}
+    worker.slot = next(i for i in range(len(used) + 1) if i not in used)
+
+
+def post_fork(server, worker):
+    os.environ["WORKER_INDEX"] = str(worker.slot)
+    # With --preload the app was imported in the master, where affinity
+    # is skipped; pin this worker now
+    from utils.runtime_config import apply_affinity
+    apply_affinity()
+
+
+def child_exit(server, worker):
+    # Master side: the dead worker's slot is free again
+    worker.slot = None
@@ -0,0 +1,48 @@
+# backend/load_answer_keys.py
+"""
+Bulk-load answer keys from a directory of <EXAM_CODE>.json files.
+
+    python load_answer_keys.py --teacher-id <id> [--dir answer_keys]
+"""
+import argparse
+import os
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from database import db
+from utils.answer_key_loader import read_key_dir, load_keys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load answer keys")
+    parser.add_argument("--teacher-id", required=True)
+    parser.add_argument("--dir", default=os.path.join(BASE_DIR, "answer_keys"))
+    parser.add_argument(
+        "--subject", default="",
+        help="Subject for newly created exams (default: derived from code)"
+    )
+    args = parser.parse_args()
+
+    entries = (
+        (code, args.subject, key) for code, key in read_key_dir(args.dir)
+    )
+    report = load_keys(db, entries, args.teacher_id)
+
+    for exam_code in sorted(report):
+        entry = report[exam_code]
+        line = f"{exam_code:<12} {entry['status']}"
+        if "error" in entry:
+            line += f"  ({entry['error']})"
+        print(line)
+
+    counts = {}
+    for entry in report.values():
+        counts[entry["status"]] = counts.get(entry["status"], 0) + 1
+    print("\n✅ Done: " + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,20 @@
 import os
 import cv2
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import tensorflow as tf
 import requests
 
+from utils.artifact_writer import artifact_writer
+from utils.blank_detector import detect_blank_option
+from utils.scoring import keyed_rows
+from utils.runtime_config import configure_runtime
+
+# Thread pools / affinity must be set before TensorFlow runs anything
+configure_runtime(tf=tf, cv2=cv2)
+
 # =====================================================
 # BASE DIRECTORY (CRITICAL FOR CLOUD)
 # =====================================================
@@ -21,6 +31,8 @@ LETTERS_MODEL_PATH = os.path.join(
 )
 
 DEBUG_SAVE_DIR = os.path.join(BASE_DIR, "debug_crops")
+DEBUG_DIGITS_DIR = os.path.join(DEBUG_SAVE_DIR, "digits")
+DEBUG_LETTERS_DIR = os.path.join(DEBUG_SAVE_DIR, "letters")
 STATIC_DIR = os.path.join(BASE_DIR, "static")
 
 
@@ -31,6 +43,37 @@ os.makedirs(STATIC_DIR, exist_ok=True)
 DIGIT_CLASS_NAMES = [str(i) for i in range(10)]
 LETTER_CLASS_NAMES = ['A', 'B', 'C', 'D']
 
+# =====================================================
+# BLANK OPTION DETECTOR SETTINGS
+# =====================================================
+BLANK_DETECTOR_ENABLED = os.getenv("MCQ_BLANK_DETECTOR", "1") == "1"
+BLANK_MIN_CONFIDENCE = float(os.getenv("MCQ_BLANK_MIN_CONFIDENCE", "0.5"))
+
+# =====================================================
+# LOW-MEMORY MODE (GRAYSCALE DECODE + REUSED BUFFERS)
+# =====================================================
+LOW_MEMORY_MODE = os.getenv("MCQ_LOW_MEMORY", "0") == "1"
+_buffers = threading.local()
+
+# =====================================================
+# INTRA-REQUEST PARALLELISM (HORIZONTAL BANDS)
+# =====================================================
+# Bands a page is split into for segmentation / row crops (0/1 = off)
+PARALLEL_BANDS = int(os.getenv("MCQ_PARALLEL_BANDS", "0"))
+# Threads shared by all requests in this worker (0 = one per band)
+BAND_WORKERS = int(os.getenv("MCQ_BAND_WORKERS", "0"))
+_band_pool = None
+_band_pool_lock = threading.Lock()
+
+# Counters used by the benchmarks to see how many CNN calls were saved
+PREDICT_STATS = {"letters_predicted": 0, "letters_skipped": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        PREDICT_STATS[name] += 1
+
 # =====================================================
 # DOWNLOAD MODEL IF NOT PRESENT (GITHUB RELEASE SAFE)
 # =====================================================
@@ -64,13 +107,26 @@ ensure_model(
 # =====================================================
 digits_model = None
 letters_model = None
+_models_lock = threading.Lock()
 
 def load_models():
     global digits_model, letters_model
-    if digits_model is None:
-        digits_model = tf.keras.models.load_model(DIGITS_MODEL_PATH)
-    if letters_model is None:
-        letters_model = tf.keras.models.load_model(LETTERS_MODEL_PATH)
+    if digits_model is not None and letters_model is not None:
+        return
+
+    # One-time init, safe under threaded (gthread / executor) workers
+    with _models_lock:
+        if digits_model is None or letters_model is None:
+            digits = tf.keras.models.load_model(DIGITS_MODEL_PATH)
+            letters = tf.keras.models.load_model(LETTERS_MODEL_PATH)
+
+            # Build the predict functions before other threads can call them
+            warm = np.zeros((1, 28, 28, 1), dtype=np.float32)
+            digits.predict(warm, verbose=0)
+            letters.predict(warm, verbose=0)
+
+            letters_model = letters
+            digits_model = digits
 
 # =====================================================
 # LOAD ANSWER KEY
@@ -102,6 +158,67 @@ def preprocess_char_for_model(char_gray):
     return np.expand_dims(np.expand_dims(final, axis=0), axis=-1), canvas
 
 
+def _batch_buffers(n):
+    """Per-thread (N,28,28,1) float32 batch + uint8 canvases, grown as needed."""
+    cap = getattr(_buffers, "batch_cap", 0)
+    if cap < n:
+        cap = max(64, 1 << (n - 1).bit_length())
+        _buffers.batch = np.empty((cap, 28, 28, 1), dtype=np.float32)
+        _buffers.canvases = np.empty((cap, 28, 28), dtype=np.uint8)
+        _buffers.batch_cap = cap
+    return _buffers.batch[:n], _buffers.canvases[:n]
+
+
+def preprocess_chars_batch(crops):
+    """
+    Batch form of preprocess_char_for_model: every crop of a page is
+    written straight into one reused (N,28,28,1) float32 buffer, then
+    normalised and inverted for the whole batch at once. Returns views
+    (batch, canvases) that stay valid until this thread's next call.
+    """
+    n = len(crops)
+    batch, canvases = _batch_buffers(n)
+    canvases.fill(0)
+
+    for i, crop in enumerate(crops):
+        if crop.ndim != 2:
+            crop = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+        _, img_bin = cv2.threshold(
+            crop, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU
+        )
+        h, w = img_bin.shape
+        if h > w:
+            new_h, new_w = 20, max(1, int(round(w * 20.0 / h)))
+        else:
+            new_w, new_h = 20, max(1, int(round(h * 20.0 / w)))
+        x_offset, y_offset = (28 - new_w) // 2, (28 - new_h) // 2
+        canvases[i, y_offset:y_offset + new_h, x_offset:x_offset + new_w] = (
+            cv2.resize(img_bin, (new_w, new_h), interpolation=cv2.INTER_AREA)
+        )
+
+    flat = batch.reshape(n, -1)
+    np.divide(canvases.reshape(n, -1), np.float32(255.0), out=flat)
+    invert = flat.mean(axis=1) > 0.5
+    if invert.any():
+        flat[invert] = 1.0 - flat[invert]
+    return batch, canvases
+
+
+def classify_chars(model, crops, class_names, debug_dir):
+    """One predict call for all crops. Returns [(label, confidence)]."""
+    if not crops:
+        return []
+    batch, canvases = preprocess_chars_batch(crops)
+    probs = model.predict(batch, verbose=0)
+
+    preds = []
+    for i, (k, conf) in enumerate(zip(probs.argmax(axis=1), probs.max(axis=1))):
+        label = class_names[k]
+        artifact_writer.sample(debug_dir, label, canvases[i])
+        preds.append((label, float(conf)))
+    return preds
+
+
 def segment_digits(crop_gray):
     _, bin_img = cv2.threshold(
         crop_gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU
@@ -139,21 +256,42 @@ def two_cluster_x(centers_x, iters=8):
 # =====================================================
 # MAIN PROCESSING FUNCTION (UNCHANGED LOGIC)
 # =====================================================
-def process_mcq_image(PAGE_IMAGE_PATH, answer_key):
-
-    load_models()
-
-   
-
-    image = cv2.imread(PAGE_IMAGE_PATH)
-    if image is None:
-        return {"error": f"Image not found at {PAGE_IMAGE_PATH}"}
+def _work_buffer(name, shape):
+    """Per-thread scratch buffer, reused while the page size is the same."""
+    buffers = getattr(_buffers, "pool", None)
+    if buffers is None:
+        buffers = _buffers.pool = {}
+    buf = buffers.get(name)
+    if buf is None or buf.shape != shape:
+        buf = np.empty(shape, dtype=np.uint8)
+        buffers[name] = buf
+    return buf
+
+
+def _segment_low_memory(gray):
+    """
+    In-place (dst=) blur/threshold/close of a grayscale page into two
+    reusable buffers, instead of the ~7 full-page copies of the default path.
+    """
+    work_a = _work_buffer("a", gray.shape)
+    work_b = _work_buffer("b", gray.shape)
+
+    cv2.GaussianBlur(gray, (3, 3), 0, dst=work_a)
+    cv2.adaptiveThreshold(
+        work_a, 255,
+        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+        cv2.THRESH_BINARY_INV, 11, 2,
+        dst=work_b
+    )
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+    cv2.morphologyEx(work_b, cv2.MORPH_CLOSE, kernel, dst=work_a, iterations=1)
+    contours, _ = cv2.findContours(
+        work_a, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
+    )
+    return contours
 
-    orig = image.copy()
-    image_vis = orig.copy()
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    H, W = gray.shape
 
+def _segment(gray):
     blurred = cv2.GaussianBlur(gray, (3, 3), 0)
     thresh = cv2.adaptiveThreshold(
         blurred, 255,
@@ -167,11 +305,249 @@ def process_mcq_image(PAGE_IMAGE_PATH, answer_key):
     contours, _ = cv2.findContours(
         thresh_closed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
     )
+    return contours
 
-    candidates = []
-    min_w, min_h = max(8, W // 150), max(12, H // 60)
+
+# =====================================================
+# PARALLEL BANDS (OPENCV RELEASES THE GIL)
+# =====================================================
+def _get_band_pool():
+    global _band_pool
+    if _band_pool is None:
+        with _band_pool_lock:
+            if _band_pool is None:
+                workers = BAND_WORKERS or PARALLEL_BANDS or os.cpu_count()
+                _band_pool = ThreadPoolExecutor(
+                    max_workers=workers or 1, thread_name_prefix="mcq-band"
+                )
+    return _band_pool
+
+
+def _segment_band(gray, y0, y1, overlap, low_memory):
+    """
+    Segments rows [y0, y1) plus `overlap` rows each side, so a box whose
+    centre lies in the band is seen whole. Returns (boxes, clipped);
+    clipped means some box ran into the overlap edge (taller than the
+    overlap), and the band split can't be trusted for this page.
+    """
+    H = gray.shape[0]
+    top, bottom = max(0, y0 - overlap), min(H, y1 + overlap)
+    band = gray[top:bottom]
+    contours = _segment_low_memory(band) if low_memory else _segment(band)
+
+    boxes, clipped = [], False
     for c in contours:
         x, y, w, h = cv2.boundingRect(c)
+        cy = top + y + h / 2.0
+        if not y0 <= cy < y1:
+            continue  # belongs to the neighbouring band
+        if (y == 0 and top > 0) or (y + h == bottom - top and bottom < H):
+            clipped = True
+        boxes.append((x, top + y, w, h))
+    return boxes, clipped
+
+
+def _segment_bands(gray, bands, low_memory):
+    """Bounding boxes of the page, segmented band by band in the pool."""
+    H = gray.shape[0]
+    overlap = max(40, H // 16)
+    # Bands must be clearly taller than the overlap to be worth it
+    bands = max(1, min(bands, H // (2 * overlap)))
+    if bands == 1:
+        return None
+
+    edges = [round(i * H / bands) for i in range(bands + 1)]
+    futures = [
+        _get_band_pool().submit(
+            _segment_band, gray, edges[i], edges[i + 1], overlap, low_memory
+        )
+        for i in range(bands)
+    ]
+
+    boxes = []
+    for f in futures:
+        band_boxes, clipped = f.result()
+        if clipped:
+            return None
+        boxes.extend(band_boxes)
+    return boxes
+
+
+def _band_chunks(items, bands):
+    size = -(-len(items) // bands)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+# =====================================================
+# PAGE SOURCES (SINGLE IMAGE OR MULTI-PAGE TIFF)
+# =====================================================
+def read_page(path, index=0, grayscale=False):
+    """Decodes one page of a (possibly multi-page) image, or None."""
+    flags = cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR
+    if index == 0:
+        return cv2.imread(path, flags)
+    ok, mats = cv2.imreadmulti(path, start=index, count=1, flags=flags)
+    return mats[0] if ok and mats else None
+
+
+def iter_pages(path, grayscale=False):
+    """
+    Yields (index, page) one decoded page at a time, so a long feeder
+    scan never holds more than one page in memory. page is None when
+    that page can't be decoded.
+    """
+    for index in range(cv2.imcount(path)):
+        yield index, read_page(path, index, grayscale)
+
+
+def process_mcq_image(PAGE_IMAGE_PATH, answer_key, low_memory=None,
+                      annotate=None, annotated_name=None, bands=None):
+
+    if low_memory is None:
+        low_memory = LOW_MEMORY_MODE
+
+    page = read_page(PAGE_IMAGE_PATH, grayscale=low_memory)
+    if page is None:
+        return {"error": f"Image not found at {PAGE_IMAGE_PATH}"}
+
+    return grade_page(
+        page, answer_key, low_memory=low_memory, annotate=annotate,
+        annotated_name=annotated_name or (
+            f"annotated_{os.path.basename(PAGE_IMAGE_PATH)}"
+        ),
+        bands=bands
+    )
+
+
+def process_mcq_pages(path, answer_key, usns, low_memory=None,
+                      annotate=None, annotated_prefix=None):
+    """
+    Grades a multi-page scan (one student per page) as a generator:
+    each page's result is yielded as soon as it is ready, with the USN
+    taken from the ordered usns list. A page without a USN, or a USN
+    without a page, yields an entry with an "error" instead.
+    """
+    if low_memory is None:
+        low_memory = LOW_MEMORY_MODE
+
+    usns = list(usns)
+    prefix = annotated_prefix or (
+        "annotated_" + os.path.splitext(os.path.basename(path))[0]
+    )
+
+    n_pages = 0
+    for index, page in iter_pages(path, grayscale=low_memory):
+        n_pages = index + 1
+        usn = usns[index] if index < len(usns) else None
+        if page is None:
+            result = {"error": f"Could not decode page {index + 1}"}
+        elif usn is None:
+            result = {"error": "No USN supplied for this page"}
+        else:
+            result = grade_page(
+                page, answer_key, low_memory=low_memory, annotate=annotate,
+                annotated_name=f"{prefix}_p{index + 1}.png"
+            )
+        del page
+        yield {"page": index + 1, "usn": usn, **result}
+
+    # More USNs than pages: report each one rather than drop it
+    for index in range(n_pages, len(usns)):
+        yield {
+            "page": index + 1,
+            "usn": usns[index],
+            "error": f"Scan has only {n_pages} page(s)"
+        }
+
+
+def _prepare_rows(gray, pairs, pad):
+    """
+    Crops every row of pairs and runs the blank check. Returns (slots,
+    digit_crops, letter_crops); slots index into the two crop lists.
+    """
+    H, W = gray.shape
+    slots = []
+    digit_crops, letter_crops = [], []
+    for left, right in pairs:
+        lx, ly, lw, lh = left['bbox']
+        left_crop = gray[
+            max(0, ly - pad):min(H, ly + lh + pad),
+            max(0, lx - pad):min(W, lx + lw + pad)
+        ]
+        chars = segment_digits(left_crop)
+        slot = {
+            "left": left, "right": right,
+            "digits": (len(digit_crops), len(digit_crops) + len(chars)),
+            "letter": None, "letter_conf": 0.0, "blank_check": None
+        }
+        digit_crops.extend(chars)
+
+        if right:
+            rx, ry, rw, rh = right['bbox']
+            right_crop = gray[
+                max(0, ry - pad):min(H, ry + rh + pad),
+                max(0, rx - pad):min(W, rx + rw + pad)
+            ]
+            is_blank = right_crop.size == 0
+            if BLANK_DETECTOR_ENABLED and not is_blank:
+                is_blank, blank_conf = detect_blank_option(right_crop)
+                slot["blank_check"] = {"blank": is_blank, "confidence": blank_conf}
+                is_blank = is_blank and blank_conf >= BLANK_MIN_CONFIDENCE
+
+            if is_blank:
+                _count("letters_skipped")
+                slot["letter_conf"] = (
+                    slot["blank_check"]["confidence"] if slot["blank_check"]
+                    else 1.0
+                )
+            else:
+                slot["letter"] = len(letter_crops)
+                letter_crops.append(right_crop)
+                _count("letters_predicted")
+        slots.append(slot)
+
+    return slots, digit_crops, letter_crops
+
+
+def grade_page(page, answer_key, low_memory=None, annotate=None,
+               annotated_name="annotated_page.png", bands=None):
+    """
+    Grades one decoded page (BGR or grayscale array). annotate defaults
+    to off in low-memory mode: the colour copy is the largest buffer.
+    """
+
+    load_models()
+
+    if low_memory is None:
+        low_memory = LOW_MEMORY_MODE
+    if annotate is None:
+        annotate = not low_memory
+    if bands is None:
+        bands = PARALLEL_BANDS
+
+    gray = page if page.ndim == 2 else cv2.cvtColor(page, cv2.COLOR_BGR2GRAY)
+    H, W = gray.shape
+
+    if annotate:
+        image_vis = (
+            cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR) if page.ndim == 2
+            else page.copy()
+        )
+    else:
+        # Colour copy only when an annotated page was asked for
+        image_vis = None
+
+    boxes = _segment_bands(gray, bands, low_memory) if bands > 1 else None
+    if boxes is None:
+        contours = (
+            _segment_low_memory(gray) if low_memory else _segment(gray)
+        )
+        boxes = [cv2.boundingRect(c) for c in contours]
+
+    # Column split needs every candidate on the page, so bands merge here
+    candidates = []
+    min_w, min_h = max(8, W // 150), max(12, H // 60)
+    for x, y, w, h in boxes:
         if w >= min_w and h >= min_h:
             candidates.append({
                 'bbox': (x, y, w, h),
@@ -211,43 +587,61 @@ def process_mcq_image(PAGE_IMAGE_PATH, answer_key):
         if not found_pair:
             pairs.append((left, None))
 
-    report_rows = []
     pad = max(3, W // 300)
 
-    for left, right in pairs:
-        lx, ly, lw, lh = left['bbox']
-        left_crop = gray[
-            max(0, ly - pad):min(H, ly + lh + pad),
-            max(0, lx - pad):min(W, lx + lw + pad)
+    # Pass 1: crop every row; characters are collected for batch predict
+    if bands > 1 and len(pairs) > 1:
+        chunks = _band_chunks(pairs, bands)
+        parts = [
+            f.result() for f in [
+                _get_band_pool().submit(_prepare_rows, gray, chunk, pad)
+                for chunk in chunks
+            ]
         ]
+    else:
+        parts = [_prepare_rows(gray, pairs, pad)]
+
+    slots, digit_crops, letter_crops = [], [], []
+    for part_slots, part_digits, part_letters in parts:
+        for slot in part_slots:
+            start, end = slot["digits"]
+            slot["digits"] = (start + len(digit_crops), end + len(digit_crops))
+            if slot["letter"] is not None:
+                slot["letter"] += len(letter_crops)
+            slots.append(slot)
+        digit_crops.extend(part_digits)
+        letter_crops.extend(part_letters)
+
+    # Pass 2: one predict call per model for the whole page
+    digit_preds = classify_chars(
+        digits_model, digit_crops, DIGIT_CLASS_NAMES, DEBUG_DIGITS_DIR
+    )
+    letter_preds = classify_chars(
+        letters_model, letter_crops, LETTER_CLASS_NAMES, DEBUG_LETTERS_DIR
+    )
 
-        digit_str = "".join([
-            DIGIT_CLASS_NAMES[
-                np.argmax(
-                    digits_model.predict(
-                        preprocess_char_for_model(ch)[0],
-                        verbose=0
-                    )[0]
-                )
-            ]
-            for ch in segment_digits(left_crop)
-        ])
+    # Pass 3: score and annotate
+    report_rows = []
+    recognitions = []
+    for slot in slots:
+        left, right = slot["left"], slot["right"]
+        lx, ly, lw, lh = left['bbox']
+
+        start, end = slot["digits"]
+        digit_str = ""
+        digit_conf = 1.0
+        for digit, conf in digit_preds[start:end]:
+            digit_conf *= conf
+            digit_str += digit
         predicted_digit = digit_str if digit_str else "?"
+        if not digit_str:
+            digit_conf = 0.0
 
         predicted_letter = ""
-        if right:
-            rx, ry, rw, rh = right['bbox']
-            right_crop = gray[
-                max(0, ry - pad):min(H, ry + rh + pad),
-                max(0, rx - pad):min(W, rx + rw + pad)
-            ]
-            if right_crop.size > 0:
-                prepared, _ = preprocess_char_for_model(right_crop)
-                predicted_letter = LETTER_CLASS_NAMES[
-                    np.argmax(
-                        letters_model.predict(prepared, verbose=0)[0]
-                    )
-                ]
+        letter_conf = slot["letter_conf"]
+        blank_check = slot["blank_check"]
+        if slot["letter"] is not None:
+            predicted_letter, letter_conf = letter_preds[slot["letter"]]
 
         result, color = "NoKey", (0, 165, 255)
         if predicted_digit in answer_key:
@@ -263,43 +657,57 @@ def process_mcq_image(PAGE_IMAGE_PATH, answer_key):
         if predicted_digit in answer_key:
             label_text += f" / {answer_key[predicted_digit]}"
 
-        cv2.putText(
-            image_vis, label_text, (lx, ly - 12),
-            cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2
-        )
-        cv2.rectangle(
-            image_vis, (lx, ly), (lx + lw, ly + lh), color, 2
-        )
-        if right:
-            rx, ry, rw, rh = right['bbox']
+        if image_vis is not None:
+            cv2.putText(
+                image_vis, label_text, (lx, ly - 12),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2
+            )
             cv2.rectangle(
-                image_vis, (rx, ry), (rx + rw, ry + rh), color, 2
+                image_vis, (lx, ly), (lx + lw, ly + lh), color, 2
             )
+            if right:
+                rx, ry, rw, rh = right['bbox']
+                cv2.rectangle(
+                    image_vis, (rx, ry), (rx + rw, ry + rh), color, 2
+                )
 
-        report_rows.append({
+        row = {
             "question_pred": predicted_digit,
             "option_pred": predicted_letter,
             "result": result
+        }
+        if blank_check is not None:
+            row["blank_check"] = blank_check
+        report_rows.append(row)
+
+        # Raw recognition, kept so a key change can be re-scored later
+        recognitions.append({
+            "question_pred": predicted_digit,
+            "question_conf": round(digit_conf, 4),
+            "option_pred": predicted_letter,
+            "option_conf": round(letter_conf, 4)
         })
 
     total_questions = len(answer_key)
-    filtered = [
-        r for r in report_rows if r["question_pred"] in answer_key
-    ]
+    filtered = keyed_rows(report_rows, answer_key)
     score = sum(1 for r in filtered if r["result"] == "Correct")
     percentage = (
         round((score / total_questions) * 100, 2)
         if total_questions > 0 else 0
     )
 
-    annotated_filename = f"annotated_{os.path.basename(PAGE_IMAGE_PATH)}"
-    OUT_VIS_PATH = os.path.join(STATIC_DIR, annotated_filename)
-    cv2.imwrite(OUT_VIS_PATH, image_vis)
+    annotated_url = None
+    if image_vis is not None:
+        OUT_VIS_PATH = os.path.join(STATIC_DIR, annotated_name)
+        # Written off the request path by the background artifact writer
+        artifact_writer.submit(OUT_VIS_PATH, image_vis, required=True)
+        annotated_url = f"/static/{annotated_name}"
 
     return {
         "score": score,
         "total": total_questions,
         "percentage": percentage,
         "results": filtered,
-        "annotated_image_url": f"/static/{annotated_filename}"
+        "recognitions": recognitions,
+        "annotated_image_url": annotated_url
     }
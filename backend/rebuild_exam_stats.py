@@ -0,0 +1,33 @@
+# backend/rebuild_exam_stats.py
+"""
+Recompute the incremental exam_stats summaries from the results collection.
+
+    python rebuild_exam_stats.py [--exam-code JAVA01] [--teacher-id <id>]
+"""
+import argparse
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from database import results_col, exam_stats_col
+from utils.exam_stats import rebuild_stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild exam analytics")
+    parser.add_argument("--exam-code", default="")
+    parser.add_argument("--teacher-id", default="")
+    args = parser.parse_args()
+
+    query = {}
+    if args.exam_code:
+        query["exam_code"] = args.exam_code.strip().upper()
+    if args.teacher_id:
+        query["teacher_id"] = args.teacher_id
+
+    rebuilt = rebuild_stats(results_col, exam_stats_col, query)
+    print(f"✅ Rebuilt {rebuilt} exam summaries")
+
+
+if __name__ == "__main__":
+    main()
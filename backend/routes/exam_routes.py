@@ -1,8 +1,14 @@
 # backend/routes/exam_routes.py
 
+import json
+
 from flask import Blueprint, request, jsonify
 from database import db
 from utils.jwt_manager import decode_token
+from utils.answer_key_loader import key_hash, load_keys, validate_key
+from utils.rescore import rescore_exam
+from utils.cache_versions import exam_scope, results_scope
+from storage import versions, scan_sessions, events
 
 exam = Blueprint("exam", __name__)
 
@@ -17,6 +23,21 @@ def auth_required(req):
         return None
 
 
+# =====================================================
+# AFTER A RE-SCORE: CACHE VERSIONS + LIVE DASHBOARDS
+# =====================================================
+def scores_changed(teacher_id, exam_code):
+    """
+    After a re-score has written the new scores: new ETags (bumped only
+    now, so a poll during the re-score can't cache old scores under
+    them) and a reset for live dashboards, which then reload the list.
+    """
+    versions.bump(exam_scope(teacher_id, exam_code), results_scope(teacher_id))
+    events.publish(exam_scope(teacher_id, exam_code), "reset", {
+        "exam_code": exam_code, "reason": "rescored"
+    })
+
+
 # =====================================================
 # ✅ CREATE EXAM
 # =====================================================
@@ -65,6 +86,11 @@ def save_key():
     if not exam_code or not answers:
         return jsonify({"error": "exam_code and answer_key required"}), 400
 
+    # Stored and hashed in the same form bulk_keys uses
+    answers, error = validate_key(answers)
+    if error:
+        return jsonify({"error": error}), 400
+
     # ✅ Verify exam belongs to teacher
     exam_obj = db.exams.find_one({
         "exam_code": exam_code,
@@ -83,12 +109,149 @@ def save_key():
     db.answer_keys.insert_one({
         "exam_code": exam_code,
         "answer_key": answers,
+        "key_hash": key_hash(answers),
         "teacher_id": teacher_id
     })
 
+    scan_sessions.invalidate_exam(teacher_id, exam_code)
+
+    # Optionally re-score already graded sheets against the new key
+    if data.get("rescore"):
+        rescored = rescore_exam(
+            db.results, db.exam_stats, exam_code, teacher_id, answers
+        )
+        scores_changed(teacher_id, exam_code)
+        return jsonify({
+            "message": "Answer Key Saved",
+            "rescored": rescored
+        }), 200
+
+    versions.bump(exam_scope(teacher_id, exam_code))
     return jsonify({"message": "Answer Key Saved"}), 200
 
 
+# =====================================================
+# ✅ RE-SCORE STORED RESULTS (NO IMAGE PROCESSING)
+# =====================================================
+@exam.post("/rescore/<exam_code>")
+def rescore(exam_code):
+    teacher_id = auth_required(request)
+    if not teacher_id:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    exam_code = exam_code.upper().strip()
+
+    key_doc = db.answer_keys.find_one({
+        "exam_code": exam_code,
+        "teacher_id": teacher_id
+    })
+    if not key_doc:
+        return jsonify({"error": "Answer key not found"}), 404
+
+    rescored = rescore_exam(
+        db.results, db.exam_stats, exam_code, teacher_id,
+        key_doc["answer_key"]
+    )
+    scores_changed(teacher_id, exam_code)
+
+    return jsonify({"exam_code": exam_code, "rescored": rescored}), 200
+
+
+# =====================================================
+# ✅ BULK LOAD ANSWER KEYS (CREATES MISSING EXAMS)
+# =====================================================
+@exam.post("/bulk_keys")
+def bulk_keys():
+    teacher_id = auth_required(request)
+    if not teacher_id:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    entries = []
+
+    # Multipart: one <EXAM_CODE>.json file per key
+    for f in request.files.getlist("files"):
+        exam_code = (f.filename or "").rsplit(".", 1)[0]
+        try:
+            entries.append((exam_code, "", json.load(f.stream)))
+        except ValueError as e:
+            entries.append((exam_code, "", f"Invalid JSON: {e}"))
+
+    # JSON: {"exams": [{"exam_code", "subject", "answer_key"}, ...]}
+    data = request.get_json(silent=True) or {}
+    items = data.get("exams", []) if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        return jsonify({"error": "exams must be a list"}), 400
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            return jsonify({"error": f"exams[{i}] must be an object"}), 400
+        exam_code = item.get("exam_code", "")
+        subject = item.get("subject", "")
+        if not isinstance(exam_code, str) or not isinstance(subject, str):
+            return jsonify({
+                "error": f"exams[{i}]: exam_code and subject must be strings"
+            }), 400
+        entries.append((exam_code, subject.strip(), item.get("answer_key", {})))
+
+    if not entries:
+        return jsonify({"error": "No answer keys supplied"}), 400
+
+    report = load_keys(db, entries, teacher_id)
+    changed = [
+        code for code, r in report.items()
+        if r["status"] in ("created", "updated")
+    ]
+    versions.bump(*[exam_scope(teacher_id, code) for code in changed])
+    for code in changed:
+        scan_sessions.invalidate_exam(teacher_id, code)
+
+    return jsonify({"results": report}), 200
+
+
+# =====================================================
+# ✅ SCAN SESSION (VALIDATE ONCE, THEN GRADE A BATCH)
+# =====================================================
+@exam.post("/scan_session")
+def open_scan_session():
+    teacher_id = auth_required(request)
+    if not teacher_id:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    data = request.get_json(silent=True) or {}
+    exam_code = data.get("exam_code", "").upper().strip()
+    if not exam_code:
+        return jsonify({"error": "exam_code required"}), 400
+
+    usns = data.get("usns")
+    if usns is not None and (
+        not isinstance(usns, list)
+        or not all(isinstance(u, str) for u in usns)
+    ):
+        return jsonify({"error": "usns must be a list of strings"}), 400
+
+    session, error = scan_sessions.create(db, teacher_id, exam_code, usns=usns)
+    if error:
+        return jsonify({"error": error}), 404
+
+    return jsonify({
+        "session_id": session["_id"],
+        "exam_code": exam_code,
+        "usns": session["usns"],
+        "questions": len(session["answer_key"]),
+        "expires_in": scan_sessions.ttl
+    }), 201
+
+
+@exam.delete("/scan_session/<session_id>")
+def close_scan_session(session_id):
+    teacher_id = auth_required(request)
+    if not teacher_id:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    if not scan_sessions.close(session_id, teacher_id):
+        return jsonify({"error": "Session not found"}), 404
+    return jsonify({"message": "Session closed"}), 200
+
+
 # =====================================================
 # ✅ GET ANSWER KEY (TEACHER SAFE)
 # =====================================================
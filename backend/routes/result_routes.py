@@ -1,10 +1,17 @@
 # backend/routes/result_routes.py
 
-from flask import Blueprint, jsonify, request, send_file
+from flask import Blueprint, Response, jsonify, request, send_file, stream_with_context
 from database import db
 from utils.jwt_manager import decode_token
+from utils.pagination import list_response, projection_args
+from utils.exam_stats import summarize
+from utils.item_analysis import item_analysis
+from utils.artifact_store import ArtifactStore, content_hash
+from storage import artifact_store, versions, events
+from utils.event_bus import sse_events, SSE_ENABLED, SSE_MAX_STREAMS
+from utils.cache_versions import exam_scope, roster_scope
 import pandas as pd
-import os
+import io
 
 result = Blueprint("result", __name__)
 
@@ -35,12 +42,12 @@ def get_student_results(usn):
 
     usn = usn.strip().upper()
 
-    rows = list(db.results.find(
+    return list_response(
+        request, db.results,
         {"usn": usn, "teacher_id": teacher_id},
-        {"_id": 0}
-    ))
-
-    return jsonify({"results": rows}), 200
+        "results",
+        projection=projection_args(request)
+    )
 
 
 # =====================================================
@@ -101,15 +108,17 @@ def class_results(exam_code):
         return jsonify({"error": "Unauthorized"}), 401
 
     exam_code = exam_code.upper()
-    rows = []
 
-    for r in db.results.find({
-        "exam_code": exam_code,
-        "teacher_id": teacher_id
-    }):
-        meta = _student_meta(r["usn"])
+    # ✅ 304 / cached copy while nothing for this exam or roster changed
+    etag, early = versions.conditional(request, [
+        exam_scope(teacher_id, exam_code), roster_scope(teacher_id)
+    ])
+    if early:
+        return early
 
-        rows.append({
+    def to_row(r):
+        meta = _student_meta(r["usn"])
+        return {
             "usn": r["usn"],
             "name": meta["name"],
             "department": meta["department"],
@@ -118,9 +127,95 @@ def class_results(exam_code):
             "score": r.get("score", 0),
             "total": r.get("total", 0),
             "percentage": r.get("percentage", 0),
-        })
+        }
 
-    return jsonify({"results": rows}), 200
+    return versions.finish(list_response(
+        request, db.results,
+        {"exam_code": exam_code, "teacher_id": teacher_id},
+        "results",
+        projection={"usn": 1, "score": 1, "total": 1, "percentage": 1},
+        transform=to_row
+    ), etag)
+
+
+# =====================================================
+# ✅ LIVE CLASS RESULTS (SERVER-SENT EVENTS)
+# =====================================================
+@result.get("/stream/<exam_code>")
+def stream_class_results(exam_code):
+    # Each open stream holds a server thread: run gunicorn with gthread
+    # (gunicorn.conf.py does when SSE_ENABLED) or serve via asgi.py
+    if not SSE_ENABLED:
+        return jsonify({"error": "Live results are disabled"}), 404
+
+    # EventSource can't set headers: token may come as ?token=
+    teacher_id = auth_required(request)
+    if not teacher_id:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    # Keep threads free for /grade; EventSource retries after `retry`
+    if SSE_MAX_STREAMS and events.subscribers() >= SSE_MAX_STREAMS:
+        return jsonify({"error": "Too many live streams"}), 503
+
+    exam_code = exam_code.strip().upper()
+
+    last_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        last_id = int(last_id) if last_id else None
+    except ValueError:
+        last_id = -1   # unknown position: ask the client to reload
+
+    sub = events.subscribe(exam_scope(teacher_id, exam_code), last_id)
+    return Response(
+        stream_with_context(sse_events(sub)),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# =====================================================
+# ✅ EXAM ANALYTICS (MEAN, STDDEV, HISTOGRAM, RANKS)
+# =====================================================
+@result.get("/stats/<exam_code>")
+def exam_stats(exam_code):
+    teacher_id = auth_required(request)
+    if not teacher_id:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    exam_code = exam_code.strip().upper()
+
+    score = request.args.get("score")
+    if score is not None:
+        try:
+            score = int(score)
+        except ValueError:
+            return jsonify({"error": "score must be an integer"}), 400
+
+    doc = db.exam_stats.find_one(
+        {"exam_code": exam_code, "teacher_id": teacher_id},
+        {"_id": 0}
+    )
+    if not doc or not doc.get("count"):
+        return jsonify({"error": "No results found"}), 404
+
+    return jsonify(summarize(doc, score)), 200
+
+
+# =====================================================
+# ✅ ITEM ANALYSIS (DIFFICULTY + DISTRACTORS, IN MONGO)
+# =====================================================
+@result.get("/item_analysis/<exam_code>")
+def exam_item_analysis(exam_code):
+    teacher_id = auth_required(request)
+    if not teacher_id:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    exam_code = exam_code.strip().upper()
+    items = item_analysis(
+        db.results, {"exam_code": exam_code, "teacher_id": teacher_id}
+    )
+
+    return jsonify({"exam_code": exam_code, "items": items}), 200
 
 
 # =====================================================
@@ -154,6 +249,23 @@ def export_class(exam_code):
     if not rows:
         return jsonify({"error": "No results found"}), 404
 
+    # Same rows -> same file; rebuilt only when the class results change
+    name = ArtifactStore.name_for(
+        "class", content_hash(exam_code, teacher_id, repr(rows)), ".xlsx"
+    )
+    if not artifact_store.touch("static", name):
+        artifact_store.put_bytes(
+            "static", build_class_xlsx(rows), ".xlsx", name=name
+        )
+
+    return send_file(
+        artifact_store.path("static", name),
+        as_attachment=True,
+        download_name=f"{exam_code}_class_results.xlsx"
+    )
+
+
+def build_class_xlsx(rows):
     df = pd.DataFrame(
         rows,
         columns=[
@@ -161,12 +273,9 @@ def export_class(exam_code):
             "Section", "Score", "Total", "Percentage"
         ]
     )
-
-    os.makedirs("static", exist_ok=True)
-    out_path = f"static/{exam_code}_class_results.xlsx"
-    df.to_excel(out_path, index=False)
-
-    return send_file(out_path, as_attachment=True)
+    out = io.BytesIO()
+    df.to_excel(out, index=False)
+    return out.getvalue()
 
 
 # =====================================================
@@ -178,12 +287,12 @@ def all_results():
     if not teacher_id:
         return jsonify({"error": "Unauthorized"}), 401
 
-    rows = list(db.results.find(
+    return list_response(
+        request, db.results,
         {"teacher_id": teacher_id},
-        {"_id": 0}
-    ))
-
-    return jsonify({"results": rows}), 200
+        "results",
+        projection=projection_args(request)
+    )
 
 
 # =====================================================
@@ -191,8 +300,6 @@ def all_results():
 # =====================================================
 @result.get("/pdf/<usn>/<exam_code>")
 def generate_pdf(usn, exam_code):
-    
-    from reportlab.pdfgen import canvas
 
     usn = usn.strip().upper()
     exam_code = exam_code.strip().upper()
@@ -206,8 +313,37 @@ def generate_pdf(usn, exam_code):
     if not data:
         return jsonify({"error": "Result not found"}), 404
 
-    os.makedirs("static", exist_ok=True)
-    out = f"static/{usn}_{exam_code}_report.pdf"
+    name = report_pdf_name(data)
+    if not artifact_store.touch("static", name):
+        artifact_store.put_bytes(
+            "static", build_report_pdf(data), ".pdf", name=name,
+            recipe={
+                "kind": "report_pdf", "usn": usn, "exam_code": exam_code,
+                "teacher_id": data.get("teacher_id")
+            }
+        )
+
+    return send_file(
+        artifact_store.path("static", name),
+        as_attachment=True,
+        download_name=f"{usn}_{exam_code}_report.pdf"
+    )
+
+
+def report_pdf_name(data):
+    digest = content_hash(
+        data.get("teacher_id"), data["usn"], data["exam_code"],
+        data.get("score"), data.get("total"),
+        data.get("percentage"), repr(data.get("results", []))
+    )
+    return ArtifactStore.name_for("report", digest, ".pdf")
+
+
+def build_report_pdf(data):
+    from reportlab.pdfgen import canvas
+
+    usn, exam_code = data["usn"], data["exam_code"]
+    out = io.BytesIO()
     c = canvas.Canvas(out)
 
     c.setFont("Helvetica-Bold", 18)
@@ -231,4 +367,4 @@ def generate_pdf(usn, exam_code):
             y = 800
 
     c.save()
-    return send_file(out, as_attachment=True)
+    return out.getvalue()
@@ -3,6 +3,10 @@
 from flask import Blueprint, request, jsonify
 from database import students_col, results_col, exams_col
 from utils.jwt_manager import decode_token
+from utils.pagination import list_response, projection_args
+from utils.roster_import import read_roster, import_roster
+from utils.cache_versions import roster_scope, results_scope
+from storage import versions
 
 student = Blueprint("student", __name__)
 
@@ -51,10 +55,39 @@ def add_student():
     }
 
     students_col.insert_one(student_doc)
+    versions.bump(roster_scope(teacher_id))
 
     return jsonify({"message": "Student added successfully"}), 201
 
 
+# =====================================================
+# ✅ BULK ROSTER IMPORT (CSV / XLSX)
+# =====================================================
+@student.route("/import", methods=["POST"])
+def import_students():
+    teacher_id = get_teacher_id(request)
+    if not teacher_id:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    if "file" not in request.files:
+        return jsonify({"error": "No roster file"}), 400
+
+    file = request.files["file"]
+    try:
+        report = import_roster(
+            students_col,
+            read_roster(file.stream, file.filename or ""),
+            teacher_id
+        )
+    finally:
+        versions.bump(roster_scope(teacher_id))
+
+    # ❌ Unreadable file: the report still lists any rows stored before it
+    if "error" in report:
+        return jsonify(report), 400
+    return jsonify(report), 200
+
+
 # =====================================================
 # ✅ LIST STUDENTS (ONLY LOGGED-IN TEACHER)
 # =====================================================
@@ -64,12 +97,16 @@ def list_students():
     if not teacher_id:
         return jsonify({"error": "Unauthorized"}), 401
 
-    students = students_col.find(
-        {"teacher_id": teacher_id},
-        {"_id": 0}
-    )
+    etag, early = versions.conditional(request, [roster_scope(teacher_id)])
+    if early:
+        return early
 
-    return jsonify({"students": list(students)}), 200
+    return versions.finish(list_response(
+        request, students_col,
+        {"teacher_id": teacher_id},
+        "students",
+        projection=projection_args(request)
+    ), etag)
 
 
 # =====================================================
@@ -83,6 +120,12 @@ def get_student(usn):
 
     usn = usn.strip().upper()
 
+    etag, early = versions.conditional(request, [
+        roster_scope(teacher_id), results_scope(teacher_id)
+    ])
+    if early:
+        return early
+
     student_record = students_col.find_one(
         {"usn": usn, "teacher_id": teacher_id},
         {"_id": 0}
@@ -106,14 +149,14 @@ def get_student(usn):
             "timestamp": r.get("timestamp")
         })
 
-    return jsonify({
+    return versions.finish(jsonify({
         "usn": student_record["usn"],
         "name": student_record["name"],
         "department": student_record.get("department", ""),
         "batch": student_record.get("batch", ""),
         "section": student_record.get("section", ""),
         "results": formatted_results
-    }), 200
+    }), etag)
 
 
 # =====================================================
@@ -0,0 +1,39 @@
+# backend/storage.py
+import os
+
+from database import db, scan_sessions_col
+from utils.artifact_store import ArtifactStore
+from utils.artifact_writer import artifact_writer
+from utils.cache_versions import VersionStore
+from utils.scan_session import ScanSessionStore
+from utils.event_bus import make_event_bus
+
+# =====================================================
+# RUNTIME FOLDERS (SHARED BYTE BUDGET)
+# =====================================================
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
+STATIC_FOLDER = os.path.join(BASE_DIR, "static")
+
+artifact_store = ArtifactStore(
+    {"static": STATIC_FOLDER, "uploads": UPLOAD_FOLDER},
+    index_col=db["artifacts"]
+)
+# Annotated pages are written by the background writer: count them too
+artifact_writer.on_write = artifact_store.record_write
+
+# =====================================================
+# READ-CACHE VERSION COUNTERS (ETAGS)
+# =====================================================
+versions = VersionStore(db["cache_versions"])
+
+# =====================================================
+# SCAN SESSIONS (PREFLIGHT FOR A BATCH OF /grade CALLS)
+# =====================================================
+scan_sessions = ScanSessionStore(scan_sessions_col)
+
+# =====================================================
+# LIVE GRADING EVENTS (SSE)
+# =====================================================
+events = make_event_bus()
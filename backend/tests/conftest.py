@@ -0,0 +1,43 @@
+# backend/tests/conftest.py
+# Run from backend/:  python -m pytest -q
+import os
+import sys
+from unittest import mock
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def database():
+    """database.py bound to an in-memory mongomock client."""
+    mongomock = pytest.importorskip("mongomock")
+    os.environ.setdefault("MONGO_URI", "mongodb://localhost")
+    with mock.patch("pymongo.MongoClient", mongomock.MongoClient):
+        import database
+    return database
+
+
+@pytest.fixture
+def db(database):
+    yield database.db
+    for name in database.db.list_collection_names():
+        database.db[name].delete_many({})
+
+
+@pytest.fixture
+def auth_headers():
+    from utils.jwt_manager import create_token
+    return lambda teacher_id: {
+        "Authorization": f"Bearer {create_token(teacher_id)}"
+    }
+
+
+@pytest.fixture
+def exam_client(db):
+    from flask import Flask
+    from routes.exam_routes import exam
+    app = Flask(__name__)
+    app.register_blueprint(exam, url_prefix="/exam")
+    return app.test_client()
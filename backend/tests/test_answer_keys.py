@@ -0,0 +1,98 @@
+# backend/tests/test_answer_keys.py
+import pytest
+
+from utils.answer_key_loader import key_hash, load_keys, validate_key
+
+
+def test_validate_key_normalizes():
+    normalized, error = validate_key({" 01": "a", 2: " d "})
+    assert error is None
+    assert normalized == {"1": "A", "2": "D"}
+
+
+def test_key_hash_ignores_order():
+    assert key_hash({"1": "A", "2": "B"}) == key_hash({"2": "B", "1": "A"})
+
+
+def test_save_key_hash_matches_bulk_load(db, exam_client, auth_headers):
+    db.exams.insert_one({"exam_code": "JAVA01", "teacher_id": "t1"})
+    res = exam_client.post("/exam/save_key", headers=auth_headers("t1"), json={
+        "exam_code": "java01", "answer_key": {"01": "a", "2": "b"}
+    })
+    assert res.status_code == 200
+
+    doc = db.answer_keys.find_one({"exam_code": "JAVA01"})
+    assert doc["answer_key"] == {"1": "A", "2": "B"}
+    assert doc["key_hash"] == key_hash(doc["answer_key"])
+
+    # Same key through the bulk loader is recognised as unchanged
+    report = load_keys(db, [("JAVA01", "", {"1": "A", "2": "B"})], "t1")
+    assert report["JAVA01"]["status"] == "unchanged"
+
+
+def test_save_key_rejects_invalid_key(db, exam_client, auth_headers):
+    db.exams.insert_one({"exam_code": "OS1", "teacher_id": "t1"})
+    res = exam_client.post("/exam/save_key", headers=auth_headers("t1"), json={
+        "exam_code": "OS1", "answer_key": {"1": "E"}
+    })
+    assert res.status_code == 400
+    assert db.answer_keys.count_documents({}) == 0
+
+
+@pytest.mark.parametrize("body", [
+    {"exams": ["JAVA01"]},
+    {"exams": [None]},
+    {"exams": {"exam_code": "JAVA01"}},
+    {"exams": [{"exam_code": "JAVA01", "subject": 5}]},
+    ["JAVA01"],
+])
+def test_bulk_keys_rejects_malformed_items(db, exam_client, auth_headers, body):
+    res = exam_client.post("/exam/bulk_keys", headers=auth_headers("t1"), json=body)
+    assert res.status_code == 400
+    assert "error" in res.get_json()
+
+
+def test_bulk_keys_loads_valid_items(db, exam_client, auth_headers):
+    res = exam_client.post("/exam/bulk_keys", headers=auth_headers("t1"), json={
+        "exams": [{"exam_code": "dbms2", "answer_key": {"1": "c"}}]
+    })
+    assert res.status_code == 200
+    assert res.get_json()["results"]["DBMS2"]["status"] == "created"
+
+
+def test_rescore_bumps_versions_after_writing_scores(
+        db, exam_client, auth_headers, monkeypatch):
+    from routes import exam_routes
+    from storage import events, versions
+    from utils.cache_versions import exam_scope, results_scope
+
+    db.exams.insert_one({"exam_code": "JAVA01", "teacher_id": "t1"})
+    scopes = [exam_scope("t1", "JAVA01"), results_scope("t1")]
+    versions._memo.clear()   # counters from earlier tests' databases
+    before = versions.get(scopes)
+    during = {}
+
+    def rescore_exam(*args):
+        during.update(versions.get(scopes))
+        return 3
+
+    monkeypatch.setattr(exam_routes, "rescore_exam", rescore_exam)
+    sub = events.subscribe(exam_scope("t1", "JAVA01"))
+    try:
+        res = exam_client.post("/exam/save_key", headers=auth_headers("t1"),
+                               json={"exam_code": "JAVA01",
+                                     "answer_key": {"1": "A"},
+                                     "rescore": True})
+        assert res.get_json()["rescored"] == 3
+
+        # Nothing bumped while the scores were being rewritten ...
+        assert during == before
+        # ... both scopes bumped once they were
+        after = versions.get(scopes)
+        assert all(after[s] > before[s] for s in scopes)
+
+        event = sub.get(timeout=1)
+        assert event[1] == "reset"
+        assert event[2]["exam_code"] == "JAVA01"
+    finally:
+        sub.close()
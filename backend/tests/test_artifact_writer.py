@@ -0,0 +1,51 @@
+# backend/tests/test_artifact_writer.py
+import threading
+
+import numpy as np
+import pytest
+
+from utils import artifact_writer as aw
+
+
+@pytest.fixture
+def slow_writes(monkeypatch):
+    """imwrite that holds the writer thread until the gate opens."""
+    gate = threading.Event()
+    written = []
+
+    def imwrite(path, image):
+        if threading.current_thread().name == "artifact-writer":
+            gate.wait(5)
+        written.append(path)
+        return True
+
+    monkeypatch.setattr(aw.cv2, "imwrite", imwrite)
+    yield gate, written
+    gate.set()
+
+
+def test_queue_is_bounded_by_bytes(tmp_path, slow_writes):
+    gate, written = slow_writes
+    page = np.zeros((1000, 1000, 3), np.uint8)          # 3 MB
+    crop = np.zeros((28, 28), np.uint8)
+    writer = aw.ArtifactWriter(max_queue=64, max_bytes=4 * 1024 * 1024)
+
+    first = str(tmp_path / "p1.png")
+    assert writer.submit(first, page, required=True)
+    # A second page would exceed the byte budget: written inline
+    second = str(tmp_path / "p2.png")
+    assert writer.submit(second, page, required=True)
+    assert writer.stats["inline"] == 1 and written == [second]
+    # ... or dropped when optional
+    assert not writer.submit(str(tmp_path / "p3.png"), page)
+    assert writer.stats["dropped"] == 1
+
+    # Small crops still fit next to the queued page
+    for i in range(10):
+        assert writer.submit(str(tmp_path / f"c{i}.png"), crop)
+    assert writer.stats["max_queued_bytes"] <= writer.max_bytes
+
+    gate.set()
+    writer.flush(timeout=5)
+    assert writer.stats["queued_bytes"] == 0
+    assert first in written and len(written) == 12
@@ -0,0 +1,42 @@
+# backend/tests/test_batch_pages.py
+import cv2
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def pages(monkeypatch):
+    """process_mcq_pages with grade_page stubbed out (no models needed)."""
+    pytest.importorskip("tensorflow")
+    import mcq_recognition
+    monkeypatch.setattr(
+        mcq_recognition, "grade_page",
+        lambda page, answer_key, **kwargs: {"score": 1, "total": 1}
+    )
+    return mcq_recognition.process_mcq_pages
+
+
+def write_scan(path, n_pages):
+    page = np.full((60, 40), 255, np.uint8)
+    assert cv2.imwritemulti(str(path), [page] * n_pages)
+    return str(path)
+
+
+def test_usns_beyond_the_last_page_are_errors(tmp_path, pages):
+    scan = write_scan(tmp_path / "scan.tif", 2)
+    out = list(pages(scan, {"1": "A"}, ["U1", "U2", "U3", "U4"],
+                     annotate=False))
+
+    assert [(r["page"], r["usn"], "error" in r) for r in out] == [
+        (1, "U1", False), (2, "U2", False), (3, "U3", True), (4, "U4", True)
+    ]
+    assert out[2]["error"] == "Scan has only 2 page(s)"
+
+
+def test_pages_beyond_the_last_usn_are_errors(tmp_path, pages):
+    scan = write_scan(tmp_path / "scan.tif", 3)
+    out = list(pages(scan, {"1": "A"}, ["U1"], annotate=False))
+
+    assert [(r["usn"], "error" in r) for r in out] == [
+        ("U1", False), (None, True), (None, True)
+    ]
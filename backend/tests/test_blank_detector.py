@@ -0,0 +1,68 @@
+# backend/tests/test_blank_detector.py
+import cv2
+import numpy as np
+import pytest
+
+from utils.blank_detector import detect_blank_option
+
+FONTS = [
+    cv2.FONT_HERSHEY_PLAIN,
+    cv2.FONT_HERSHEY_SIMPLEX,
+    cv2.FONT_HERSHEY_DUPLEX,
+    cv2.FONT_HERSHEY_COMPLEX,
+    cv2.FONT_HERSHEY_TRIPLEX,
+]
+
+
+def letter_crop(ch, font=cv2.FONT_HERSHEY_PLAIN, scale=1.2, thick=1, pad=3):
+    """Tight crop of one dark letter on white, like an option crop."""
+    (tw, th), base = cv2.getTextSize(ch, font, scale, thick)
+    img = np.full((th + base + 20, tw + 20), 255, np.uint8)
+    cv2.putText(img, ch, (10, th + 10), font, scale, 20, thick)
+    ys, xs = np.where(img < 128)
+    return img[max(0, ys.min() - pad):ys.max() + pad + 1,
+               max(0, xs.min() - pad):xs.max() + pad + 1]
+
+
+def box_crop(w=65, h=70, stroke=2, pad=4, letter=None):
+    """A printed option box, optionally with a letter written inside."""
+    img = np.full((h + 2 * pad, w + 2 * pad), 255, np.uint8)
+    cv2.rectangle(img, (pad, pad), (pad + w - 1, pad + h - 1), 40, stroke)
+    if letter:
+        cv2.putText(img, letter, (pad + w // 4, pad + 3 * h // 4),
+                    cv2.FONT_HERSHEY_SIMPLEX, h / 40.0, 20, 2)
+    return img
+
+
+def test_thin_plain_d_is_not_blank():
+    crop = letter_crop("D", pad=4)
+    is_blank, _ = detect_blank_option(crop)
+    assert not is_blank
+
+
+@pytest.mark.parametrize("font", FONTS)
+@pytest.mark.parametrize("scale", [0.8, 1.2, 2.0, 3.5])
+@pytest.mark.parametrize("thick", [1, 2])
+@pytest.mark.parametrize("ch", list("ABCDO"))
+def test_letters_are_not_blank(ch, font, scale, thick):
+    is_blank, _ = detect_blank_option(letter_crop(ch, font, scale, thick))
+    assert not is_blank
+
+
+@pytest.mark.parametrize("w,h,stroke", [
+    (65, 70, 2), (30, 30, 1), (40, 60, 3), (100, 90, 2), (24, 24, 1),
+])
+def test_empty_box_is_blank(w, h, stroke):
+    is_blank, confidence = detect_blank_option(box_crop(w, h, stroke))
+    assert is_blank
+    assert confidence > 0.9
+
+
+def test_box_with_letter_is_not_blank():
+    is_blank, _ = detect_blank_option(box_crop(65, 70, 2, letter="B"))
+    assert not is_blank
+
+
+def test_white_crop_is_blank():
+    assert detect_blank_option(np.full((40, 30), 255, np.uint8)) == (True, 1.0)
+    assert detect_blank_option(np.zeros((0, 0), np.uint8))[0]
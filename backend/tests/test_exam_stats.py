@@ -0,0 +1,68 @@
+# backend/tests/test_exam_stats.py
+from utils.exam_stats import rebuild_stats, record_result_change, summarize
+
+
+def result(teacher_id, exam_code, usn, score, rows=()):
+    return {
+        "teacher_id": teacher_id, "exam_code": exam_code, "usn": usn,
+        "score": score, "total": 3,
+        "results": [{"question_pred": q, "result": r} for q, r in rows],
+    }
+
+
+def seed(db):
+    docs = [
+        result("t1", "JAVA01", "U1", 2, [("1", "Correct"), ("2", "Wrong")]),
+        result("t1", "JAVA01", "U2", 3, [("1", "Correct")]),
+        result("t1", "OS1", "U1", 1),
+        result("t2", "JAVA01", "U9", 0, [("1", "NotAttempted")]),
+    ]
+    for doc in docs:
+        db.results.insert_one(dict(doc))
+        record_result_change(db.exam_stats, None, doc)
+
+
+def stats(db):
+    return {
+        (d["teacher_id"], d["exam_code"]): d
+        for d in db.exam_stats.find({}, {"_id": 0})
+    }
+
+
+def test_full_rebuild_matches_incremental_and_keeps_indexes(db):
+    seed(db)
+    incremental = stats(db)
+    indexes = sorted(db.exam_stats.index_information())
+
+    assert rebuild_stats(db.results, db.exam_stats) == 3
+    rebuilt = stats(db)
+
+    assert set(rebuilt) == set(incremental)
+    for key, doc in rebuilt.items():
+        assert summarize(doc) == summarize(incremental[key])
+    assert sorted(db.exam_stats.index_information()) == indexes
+    assert [
+        n for n in db.list_collection_names() if "_rebuild_" in n
+    ] == []
+
+
+def test_full_rebuild_drops_exams_without_results(db):
+    seed(db)
+    db.results.delete_many({"exam_code": "OS1"})
+    rebuild_stats(db.results, db.exam_stats)
+    assert ("t1", "OS1") not in stats(db)
+
+
+def test_scoped_rebuild_leaves_other_exams_alone(db):
+    seed(db)
+    # A summary outside the scope that the results can't reproduce
+    db.exam_stats.update_one(
+        {"teacher_id": "t2", "exam_code": "JAVA01"}, {"$set": {"count": 99}}
+    )
+    db.results.delete_many({"exam_code": "OS1"})
+
+    assert rebuild_stats(db.results, db.exam_stats, {"teacher_id": "t1"}) == 1
+    after = stats(db)
+    assert ("t1", "OS1") not in after
+    assert after[("t1", "JAVA01")]["count"] == 2
+    assert after[("t2", "JAVA01")]["count"] == 99
@@ -0,0 +1,98 @@
+# backend/tests/test_roster_import.py
+import io
+import zipfile
+
+import pytest
+
+from utils.roster_import import has_unique_usn_index, import_roster, read_roster
+
+
+def roster(text):
+    return read_roster(io.BytesIO(text.encode()), "roster.csv")
+
+
+# A field over csv.field_size_limit() (128 KiB) is a csv.Error
+MALFORMED = b"usn,name\n1AB01," + b"x" * 200000 + b"\n"
+CSV = "USN,Name\n1ab01,Asha\n1AB02,Ravi\n1ab01,Asha again\n,Nobody\n"
+
+
+def statuses(report):
+    return [(r["usn"], r["status"]) for r in report["rows"]]
+
+
+@pytest.mark.parametrize("indexed", [True, False])
+def test_import_dedupes_file_and_database(db, indexed):
+    col = db.students if indexed else db.students_no_index
+    assert has_unique_usn_index(col) is indexed
+    col.insert_one({"usn": "1AB02", "name": "Ravi", "teacher_id": "t1"})
+
+    report = import_roster(col, roster(CSV), "t1")
+
+    assert statuses(report) == [
+        ("1AB01", "inserted"), ("1AB02", "duplicate"),
+        ("1AB01", "duplicate"), ("", "invalid"),
+    ]
+    assert (report["inserted"], report["duplicate"], report["invalid"]) == (1, 2, 1)
+    assert col.count_documents({"teacher_id": "t1"}) == 2
+
+    # Importing again adds nothing, with or without the index
+    again = import_roster(col, roster(CSV), "t1")
+    assert again["inserted"] == 0
+    assert col.count_documents({"teacher_id": "t1"}) == 2
+
+
+def test_same_usn_for_another_teacher_is_inserted(db):
+    db.students_no_index.insert_one({"usn": "1AB01", "teacher_id": "t2"})
+    report = import_roster(db.students_no_index, roster(CSV), "t1")
+    assert report["inserted"] == 2
+
+
+def test_malformed_csv_is_a_value_error():
+    with pytest.raises(ValueError, match="Malformed CSV"):
+        list(read_roster(io.BytesIO(MALFORMED), "roster.csv"))
+
+
+@pytest.fixture
+def upload(db, auth_headers):
+    from flask import Flask
+    from routes.student_routes import student
+    app = Flask(__name__)
+    app.register_blueprint(student, url_prefix="/student")
+    client = app.test_client()
+    return lambda data, name: client.post(
+        "/student/import", headers=auth_headers("t1"),
+        data={"file": (io.BytesIO(data), name)}
+    )
+
+
+def test_malformed_csv_upload_is_a_400(upload):
+    res = upload(MALFORMED, "roster.csv")
+    assert res.status_code == 400
+    assert "Malformed CSV" in res.get_json()["error"]
+
+
+def test_malformed_row_after_a_stored_chunk_reports_it(db, upload):
+    good = "".join(f"1AB{i:04d},Student {i}\n" for i in range(1500))
+    data = b"usn,name\n" + good.encode() + MALFORMED.split(b"\n", 1)[1]
+
+    res = upload(data, "roster.csv")
+    body = res.get_json()
+    assert res.status_code == 400
+    assert "Malformed CSV at line 1502" in body["error"]
+    assert body["inserted"] == 1500
+    assert len(body["rows"]) == 1500
+    assert db.students.count_documents({"teacher_id": "t1"}) == 1500
+
+
+@pytest.mark.parametrize("data", [b"not a zip", None])
+def test_corrupt_xlsx_upload_is_a_400(db, upload, data):
+    if data is None:
+        # A valid zip with no workbook inside
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as z:
+            z.writestr("readme.txt", "hello")
+        data = buf.getvalue()
+
+    res = upload(data, "roster.xlsx")
+    assert res.status_code == 400
+    assert "Not a valid .xlsx file" in res.get_json()["error"]
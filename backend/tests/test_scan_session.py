@@ -0,0 +1,67 @@
+# backend/tests/test_scan_session.py
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.scan_session import ScanSessionStore, check_sheet
+
+
+@pytest.fixture
+def store(db):
+    db.exams.insert_one({"exam_code": "JAVA01", "teacher_id": "t1"})
+    db.answer_keys.insert_one(
+        {"exam_code": "JAVA01", "teacher_id": "t1", "answer_key": {"1": "A"}}
+    )
+    db.students.insert_many([
+        {"usn": "1AB01", "teacher_id": "t1"},
+        {"usn": "1AB02", "teacher_id": "t1"},
+    ])
+    return ScanSessionStore(db.scan_sessions, ttl=60, local_ttl=30)
+
+
+def test_session_is_bound_to_its_teacher(db, store):
+    session, error = store.create(db, "t1", "JAVA01")
+    assert error is None
+    session = store.get(session["_id"])
+
+    assert check_sheet(session, "t1", ["1AB01"], "JAVA01") == (None, None)
+    assert check_sheet(session, "t2", ["1AB01"], "JAVA01")[1] == 403
+    assert check_sheet(session, None, ["1AB01"], "JAVA01")[1] == 401
+    assert check_sheet(session, "t1", ["1AB09"], "JAVA01")[1] == 404
+    assert check_sheet(session, "t1", ["1AB01"], "OS1")[1] == 400
+    assert check_sheet(None, "t1", ["1AB01"])[1] == 401
+
+
+def test_create_prunes_stale_local_entries(db, store):
+    old, _ = store.create(db, "t1", "JAVA01")
+    gone, _ = store.create(db, "t1", "JAVA01")
+
+    # One entry no longer re-checked recently, one already expired
+    session, _ = store._local[old["_id"]]
+    store._local[old["_id"]] = (session, store._pruned_at - 60)
+    session, _ = store._local[gone["_id"]]
+    session["expires_at"] = datetime.utcnow() - timedelta(seconds=1)
+    store._pruned_at -= store.local_ttl
+
+    fresh, _ = store.create(db, "t1", "JAVA01")
+    assert set(store._local) == {fresh["_id"]}
+
+    # Pruned from memory only: the live session still resolves from Mongo
+    assert store.get(old["_id"])["exam_code"] == "JAVA01"
+
+
+def test_open_rejects_usns_that_are_not_a_list(db, store, exam_client,
+                                               auth_headers):
+    for usns in ["1AB01", [1, 2], {"1AB01": True}]:
+        res = exam_client.post(
+            "/exam/scan_session", headers=auth_headers("t1"),
+            json={"exam_code": "JAVA01", "usns": usns}
+        )
+        assert res.status_code == 400
+
+    res = exam_client.post(
+        "/exam/scan_session", headers=auth_headers("t1"),
+        json={"exam_code": "JAVA01", "usns": ["1ab02"]}
+    )
+    assert res.status_code == 201
+    assert res.get_json()["usns"] == ["1AB02"]
@@ -0,0 +1,122 @@
+# backend/tests/test_scoring.py
+import itertools
+
+import pytest
+
+from utils.rescore import score_matrix
+from utils.scoring import keyed_rows
+
+KEY = {"1": "A", "2": "B", "3": "C"}
+
+
+def rec(q, opt):
+    return {"question_pred": q, "option_pred": opt}
+
+
+def test_keyed_rows_keeps_every_keyed_row():
+    rows = [rec("1", "A"), rec("?", "B"), rec("2", "C"), rec("1", "D"),
+            rec("9", "A"), rec("2", "B")]
+    assert keyed_rows(rows, KEY) == [rec("1", "A"), rec("2", "C"),
+                                     rec("1", "D"), rec("2", "B")]
+
+
+def test_score_matrix_scores_each_row():
+    doc = {"_id": 1, "recognitions": [
+        rec("1", "A"), rec("2", "C"), rec("3", ""), rec("7", "B")
+    ]}
+    [(_id, fields)] = score_matrix([doc], KEY)
+    assert _id == 1
+    assert fields["score"] == 1
+    assert fields["total"] == 3
+    assert fields["percentage"] == 33.33
+    assert [(r["question_pred"], r["result"]) for r in fields["results"]] == [
+        ("1", "Correct"), ("2", "Wrong"), ("3", "NotAttempted")
+    ]
+
+
+def test_score_matrix_counts_duplicates_like_grade_page():
+    """A question read twice is scored twice, each read on its own."""
+    doc = {"_id": 1, "recognitions": [
+        rec("1", "A"), rec("1", "A"), rec("2", "B"), rec("2", "D"),
+        rec("3", "")
+    ]}
+    [(_, fields)] = score_matrix([doc], KEY)
+    assert fields["score"] == 3
+    assert fields["percentage"] == 100.0
+    assert [r["result"] for r in fields["results"]] == [
+        "Correct", "Correct", "Correct", "Wrong", "NotAttempted"
+    ]
+
+
+def test_score_matrix_scores_several_docs():
+    docs = [
+        {"_id": 1, "recognitions": [rec("1", "A"), rec("3", "C")]},
+        {"_id": 2, "recognitions": []},
+        {"_id": 3, "recognitions": [rec("2", "B"), rec("2", "B")]},
+    ]
+    assert [(i, f["score"]) for i, f in score_matrix(docs, KEY)] == [
+        (1, 2), (2, 0), (3, 2)
+    ]
+
+
+def test_score_matrix_falls_back_to_stored_results():
+    doc = {"_id": 2, "results": [rec("2", "B"), rec("3", "C")]}
+    [(_, fields)] = score_matrix([doc], KEY)
+    assert fields["score"] == 2
+
+
+def test_grade_page_matches_score_matrix(monkeypatch):
+    """Re-scoring a page's recognitions gives the score it was graded with."""
+    pytest.importorskip("tensorflow")
+    import mcq_recognition
+    from benchmarks.synthetic_sheets import make_sheet
+
+    # Every digit reads as "1": questions 1-9 all become "1" and 10-20
+    # become "11", so the page is full of duplicate question numbers
+    letters = itertools.cycle("ABCD")
+
+    def classify(model, crops, class_names, debug_dir):
+        if class_names is mcq_recognition.DIGIT_CLASS_NAMES:
+            return [("1", 0.99)] * len(crops)
+        return [(next(letters), 0.99) for _ in crops]
+
+    monkeypatch.setattr(mcq_recognition, "load_models", lambda: None)
+    monkeypatch.setattr(mcq_recognition, "classify_chars", classify)
+
+    page, _, _ = make_sheet(20, blank_ratio=0.2, seed=3)
+    key = {"1": "B", "11": "A"}
+    graded = mcq_recognition.grade_page(page, key, annotate=False, bands=1)
+    assert "error" not in graded
+
+    [(_, rescored)] = score_matrix(
+        [{"_id": 0, "recognitions": graded["recognitions"]}], key
+    )
+    assert rescored["score"] == graded["score"]
+    assert rescored["percentage"] == graded["percentage"]
+
+    def outcomes(rows):
+        return [(r["question_pred"], r["option_pred"], r["result"])
+                for r in rows]
+    assert outcomes(rescored["results"]) == outcomes(graded["results"])
+
+
+@pytest.mark.parametrize("low_memory, annotated", [(False, True), (True, False)])
+def test_grade_page_annotate_default(monkeypatch, low_memory, annotated):
+    """Unset annotate means on, except in low-memory mode."""
+    pytest.importorskip("tensorflow")
+    import mcq_recognition
+    from benchmarks.synthetic_sheets import make_sheet
+
+    monkeypatch.setattr(mcq_recognition, "load_models", lambda: None)
+    monkeypatch.setattr(mcq_recognition, "classify_chars",
+                        lambda model, crops, names, debug_dir:
+                        [("1", 0.99)] * len(crops))
+    written = []
+    monkeypatch.setattr(mcq_recognition.artifact_writer, "submit",
+                        lambda path, image, **kw: written.append(path))
+
+    page, _, _ = make_sheet(5, seed=1)
+    graded = mcq_recognition.grade_page(page, {"1": "A"},
+                                        low_memory=low_memory, bands=1)
+    assert (graded["annotated_image_url"] is not None) == annotated
+    assert bool(written) == annotated
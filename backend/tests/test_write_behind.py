@@ -0,0 +1,207 @@
+# backend/tests/test_write_behind.py
+from datetime import datetime
+
+import pytest
+
+from utils import write_behind
+from utils.exam_stats import record_result_change
+from utils.write_behind import ResultWriteBehind
+
+
+class FlakyResults:
+    """
+    A results collection whose next `failures` bulk writes raise.
+    before_write runs once just before the next bulk write, standing in
+    for another worker writing between the read and the write.
+    """
+
+    def __init__(self, col, failures=0, before_write=None):
+        self.col = col
+        self.failures = failures
+        self.before_write = before_write
+        self.calls = []
+
+    def find(self, *args, **kwargs):
+        self.calls.append("find")
+        return self.col.find(*args, **kwargs)
+
+    def bulk_write(self, ops, **kwargs):
+        self.calls.append("bulk_write")
+        if self.before_write:
+            hook, self.before_write = self.before_write, None
+            hook()
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database down")
+        return self.col.bulk_write(ops, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.col, name)
+
+
+def grade(usn, score, exam_code="JAVA01"):
+    return {"usn": usn, "exam_code": exam_code, "teacher_id": "t1",
+            "score": score, "total": 3, "results": []}
+
+
+@pytest.fixture
+def buffer(db):
+    # Never due on its own: every flush in these tests is explicit
+    return lambda results, **kw: ResultWriteBehind(
+        results, db.exam_stats, max_batch=1000, max_delay=3600, **kw
+    )
+
+
+def test_flush_writes_and_marks_durable(db, buffer):
+    flushed = []
+    wb = buffer(db.results, on_flush=flushed.extend)
+    first = wb.submit(grade("U1", 1))
+    second = wb.submit(grade("U1", 2))   # same sheet: coalesced
+    other = wb.submit(grade("U2", 3))
+
+    assert wb.status(second, "t1") == "pending"
+    assert wb.flush() == 2
+    assert [wb.status(t, "t1") for t in (first, second, other)] == [
+        "superseded", "durable", "durable"
+    ]
+    assert db.results.find_one({"usn": "U1"})["score"] == 2
+    assert [d["usn"] for d in flushed] == ["U1", "U2"]
+    assert db.exam_stats.find_one({"exam_code": "JAVA01"})["count"] == 2
+
+
+def test_flush_is_one_read_and_one_bulk_write(db, buffer):
+    results = FlakyResults(db.results)
+    db.results.insert_one({**grade("U1", 0), "write_id": "old"})
+    record_result_change(db.exam_stats, None, grade("U1", 0))
+    wb = buffer(results)
+    for i in range(20):
+        wb.submit(grade(f"U{i}", i % 4))
+
+    assert wb.flush() == 20
+    assert results.calls == ["find", "bulk_write"]
+    assert db.results.count_documents({}) == 20
+    doc = db.exam_stats.find_one({"exam_code": "JAVA01"})
+    assert doc["count"] == 20
+    assert doc["sum"] == sum(i % 4 for i in range(20))
+
+
+def test_sheet_replaced_by_another_worker_is_retried(db, buffer):
+    db.results.insert_one({**grade("U1", 1), "write_id": "first"})
+    other = ResultWriteBehind(db.results, db.exam_stats)
+    record_result_change(db.exam_stats, None, grade("U1", 1))
+
+    def other_worker_writes():
+        other.submit(grade("U1", 2))
+        other.flush()
+
+    wb = buffer(FlakyResults(db.results, before_write=other_worker_writes))
+    token = wb.submit(grade("U1", 3))
+
+    # The guarded replace misses: U1 changed after it was read
+    assert wb.flush() == 0
+    assert wb.status(token, "t1") == "pending"
+    assert db.results.find_one({"usn": "U1"})["score"] == 2
+
+    assert wb.flush() == 1
+    assert wb.status(token, "t1") == "durable"
+    assert db.results.count_documents({"usn": "U1"}) == 1
+    doc = db.exam_stats.find_one({"exam_code": "JAVA01"})
+    assert (doc["count"], doc["sum"]) == (1, 3)
+
+
+def test_failed_flush_is_retried_after_backoff(db, buffer):
+    wb = buffer(FlakyResults(db.results, failures=1))
+    token = wb.submit(grade("U1", 1))
+    wb.submit(grade("U2", 2))
+
+    assert wb.flush() == 0
+    assert wb.status(token, "t1") == "pending"
+    assert wb.stats()["pending"] == 2
+    assert not wb._due()   # backing off
+
+    assert wb.flush() == 2
+    assert wb.status(token, "t1") == "durable"
+    assert db.results.count_documents({}) == 2
+    assert wb.metrics["retried_docs"] == 2
+    assert wb._retry_at == 0.0
+
+
+def test_regrade_during_outage_supersedes_the_failed_write(db, buffer):
+    wb = buffer(FlakyResults(db.results, failures=1))
+    old = wb.submit(grade("U1", 1))
+    wb.flush()
+    new = wb.submit(grade("U1", 3))
+
+    assert wb.flush() == 1
+    assert (wb.status(old, "t1"), wb.status(new, "t1")) == ("superseded", "durable")
+    assert db.results.find_one({"usn": "U1"})["score"] == 3
+
+
+def test_gives_up_after_max_attempts(db, buffer, monkeypatch):
+    monkeypatch.setattr(write_behind, "RESULT_FLUSH_MAX_ATTEMPTS", 2)
+    wb = buffer(FlakyResults(db.results, failures=5))
+    token = wb.submit(grade("U1", 1))
+
+    wb.flush()
+    assert wb.status(token, "t1") == "pending"
+    wb.flush()
+    assert wb.status(token, "t1") == "failed"
+    assert wb.stats()["pending"] == 0
+    assert wb.metrics["failed_docs"] == 1
+
+
+def test_on_flush_error_keeps_results_durable(db, buffer):
+    def broken(docs):
+        raise RuntimeError("publish failed")
+
+    wb = buffer(db.results, on_flush=broken)
+    token = wb.submit(grade("U1", 1))
+    assert wb.flush() == 1
+    assert wb.status(token, "t1") == "durable"
+    assert wb.metrics["on_flush_errors"] == 1
+
+
+def test_token_from_elsewhere_is_unknown(db, buffer):
+    wb = buffer(db.results)
+    assert wb.status("U1:JAVA01:0:not-ours", "t1") == "unknown"
+    assert wb.status("garbage", "t1") == "unknown"
+
+
+def test_new_sheet_inserted_by_another_worker_rebuilds_stats(db, buffer):
+    other = ResultWriteBehind(db.results, db.exam_stats)
+
+    def other_worker_inserts():
+        other.submit(grade("U1", 2))
+        other.flush()
+
+    wb = buffer(FlakyResults(db.results, before_write=other_worker_inserts))
+    wb.submit(grade("U1", 3))
+    wb.submit(grade("U2", 1))
+
+    # The upsert for U1 overwrote the other worker's insert; the exam's
+    # summary is recomputed instead of adding U1 twice
+    assert wb.flush() == 2
+    assert db.results.count_documents({}) == 2
+    doc = db.exam_stats.find_one({"exam_code": "JAVA01"})
+    assert (doc["count"], doc["sum"]) == (2, 4)
+
+
+def test_status_is_only_reported_to_the_owning_teacher(db, buffer):
+    wb = buffer(db.results)
+    token = wb.submit(grade("U1", 1))
+    assert wb.status(token, "t2") == "unknown"
+    wb.flush()
+    assert wb.status(token, "t2") == "unknown"
+
+    # Another worker only has the database to go on
+    other = buffer(db.results)
+    assert other.status(token, "t1") == "durable"
+    assert other.status(token, "t2") == "unknown"
+
+
+def test_status_does_not_reveal_other_teachers_results(db, buffer):
+    db.results.insert_one({**grade("U1", 1), "timestamp": datetime.utcnow()})
+    probe = "U1:JAVA01:0:guessed"
+    wb = buffer(db.results)
+    assert wb.status(probe, "t1") == "superseded"
+    assert wb.status(probe, "t2") == "unknown"
@@ -0,0 +1,124 @@
+# backend/utils/answer_key_loader.py
+import hashlib
+import json
+import os
+import re
+
+from pymongo import UpdateOne
+
+VALID_OPTIONS = {"A", "B", "C", "D"}
+
+
+# =====================================================
+# VALIDATION + HASHING
+# =====================================================
+def validate_key(answer_key):
+    """
+    Returns (normalized_key, error). Question numbers must be positive
+    integers and options one of A-D.
+    """
+    if not isinstance(answer_key, dict) or not answer_key:
+        return None, "answer_key must be a non-empty object"
+
+    normalized = {}
+    for q, opt in answer_key.items():
+        q = str(q).strip()
+        opt = str(opt).strip().upper()
+        if not q.isdigit() or int(q) < 1:
+            return None, f"Invalid question number: {q}"
+        if opt not in VALID_OPTIONS:
+            return None, f"Invalid option for question {q}: {opt}"
+        normalized[str(int(q))] = opt
+
+    return normalized, None
+
+
+def key_hash(answer_key):
+    raw = json.dumps(answer_key, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def subject_from_code(exam_code):
+    # JAVA01 -> JAVA, OS2 -> OS
+    return re.sub(r"\d+$", "", exam_code) or exam_code
+
+
+def read_key_dir(path):
+    """Yields (exam_code, answer_key) for every *.json file in path."""
+    for name in sorted(os.listdir(path)):
+        if not name.lower().endswith(".json"):
+            continue
+        exam_code = os.path.splitext(name)[0].upper().strip()
+        with open(os.path.join(path, name), encoding="utf-8") as f:
+            try:
+                yield exam_code, json.load(f)
+            except json.JSONDecodeError as e:
+                yield exam_code, f"Invalid JSON: {e}"
+
+
+# =====================================================
+# BULK UPSERT
+# =====================================================
+def load_keys(db, entries, teacher_id):
+    """
+    entries: iterable of (exam_code, subject, answer_key).
+    Validates everything first, skips keys whose hash is unchanged and
+    upserts the rest with one bulk_write per collection.
+    """
+    report = {}
+    valid = {}
+
+    for exam_code, subject, answer_key in entries:
+        exam_code = str(exam_code).upper().strip()
+        if not exam_code:
+            continue
+        if isinstance(answer_key, str):
+            report[exam_code] = {"status": "invalid", "error": answer_key}
+            continue
+        normalized, error = validate_key(answer_key)
+        if error:
+            report[exam_code] = {"status": "invalid", "error": error}
+            continue
+        valid[exam_code] = (
+            subject or subject_from_code(exam_code),
+            normalized,
+            key_hash(normalized)
+        )
+
+    if not valid:
+        return report
+
+    existing = {
+        d["exam_code"]: d.get("key_hash")
+        for d in db.answer_keys.find(
+            {"teacher_id": teacher_id, "exam_code": {"$in": list(valid)}},
+            {"exam_code": 1, "key_hash": 1}
+        )
+    }
+
+    exam_ops, key_ops = [], []
+    for exam_code, (subject, normalized, digest) in valid.items():
+        exam_ops.append(UpdateOne(
+            {"exam_code": exam_code, "teacher_id": teacher_id},
+            {"$setOnInsert": {"subject": subject}},
+            upsert=True
+        ))
+
+        if existing.get(exam_code) == digest:
+            report[exam_code] = {"status": "unchanged"}
+            continue
+
+        key_ops.append(UpdateOne(
+            {"exam_code": exam_code, "teacher_id": teacher_id},
+            {"$set": {"answer_key": normalized, "key_hash": digest}},
+            upsert=True
+        ))
+        report[exam_code] = {
+            "status": "updated" if exam_code in existing else "created"
+        }
+
+    db.exams.bulk_write(exam_ops, ordered=False)
+    if key_ops:
+        db.answer_keys.bulk_write(key_ops, ordered=False)
+
+    return report
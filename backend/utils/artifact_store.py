@@ -0,0 +1,170 @@
+# backend/utils/artifact_store.py
+import hashlib
+import os
+import threading
+import time
+import uuid
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+ARTIFACT_STORE_MAX_BYTES = int(
+    os.getenv("ARTIFACT_STORE_MAX_BYTES", str(2 * 1024 ** 3))
+)
+# Full directory scans for eviction happen at most this often
+ARTIFACT_EVICT_INTERVAL = float(os.getenv("ARTIFACT_EVICT_INTERVAL", "30"))
+
+
+def content_hash(*parts):
+    h = hashlib.sha256()
+    for p in parts:
+        h.update(p if isinstance(p, bytes) else str(p).encode())
+        h.update(b"\0")
+    return h.hexdigest()[:32]
+
+
+# =====================================================
+# CONTENT-ADDRESSED STORE WITH LRU EVICTION
+# =====================================================
+class ArtifactStore:
+    """
+    Files under a few areas (static/, uploads/) named by content hash,
+    sharing one byte budget. Last access is the file mtime, bumped on
+    every read, so all workers see the same LRU order without extra
+    bookkeeping. Recipes for derived artifacts (annotated page, PDF,
+    xlsx) are kept in an index collection so they can be rebuilt after
+    eviction.
+    """
+
+    def __init__(self, areas, index_col=None,
+                 max_bytes=ARTIFACT_STORE_MAX_BYTES,
+                 evict_interval=ARTIFACT_EVICT_INTERVAL):
+        self.areas = areas
+        self.index_col = index_col
+        self.max_bytes = max_bytes
+        self.evict_interval = evict_interval
+
+        self._lock = threading.Lock()
+        self._last_scan = 0.0
+        self._added_since_scan = 0
+        self.stats = {"stored": 0, "reused": 0, "evicted": 0,
+                      "evicted_bytes": 0, "regenerated": 0}
+
+        for path in areas.values():
+            os.makedirs(path, exist_ok=True)
+
+    # -------------------------------------------------
+    def path(self, area, name):
+        return os.path.join(self.areas[area], os.path.basename(name))
+
+    @staticmethod
+    def name_for(kind, digest, ext):
+        return f"{kind}_{digest}{ext}"
+
+    def exists(self, area, name):
+        return os.path.exists(self.path(area, name))
+
+    def touch(self, area, name):
+        try:
+            os.utime(self.path(area, name), None)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def put_bytes(self, area, data, ext, kind="blob", name=None,
+                  recipe=None):
+        """
+        Stores data under its content hash (or the given derived name).
+        An existing file with the same name is reused, not rewritten.
+        """
+        name = name or self.name_for(kind, content_hash(data), ext)
+        path = self.path(area, name)
+
+        if os.path.exists(path):
+            os.utime(path, None)
+            self.stats["reused"] += 1
+        else:
+            tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            self.stats["stored"] += 1
+            self.added(len(data))
+
+        if recipe is not None:
+            self.register(name, area, recipe)
+        return name
+
+    def register(self, name, area, recipe):
+        if self.index_col is None:
+            return
+        self.index_col.update_one(
+            {"_id": name},
+            {"$setOnInsert": {"area": area, "recipe": recipe,
+                              "created": time.time()}},
+            upsert=True
+        )
+
+    def recipe(self, name):
+        if self.index_col is None:
+            return None
+        doc = self.index_col.find_one({"_id": os.path.basename(name)})
+        return doc.get("recipe") if doc else None
+
+    # -------------------------------------------------
+    def added(self, nbytes):
+        """Record bytes written outside put_bytes (e.g. async writers)."""
+        with self._lock:
+            self._added_since_scan += nbytes
+            due = (
+                time.monotonic() - self._last_scan >= self.evict_interval
+                or self._added_since_scan >= self.max_bytes // 20
+            )
+        if due:
+            self.evict()
+
+    def record_write(self, path):
+        """Counts a file written into one of the areas by someone else."""
+        path = os.path.abspath(path)
+        for root in self.areas.values():
+            if os.path.dirname(path) == os.path.abspath(root):
+                try:
+                    self.added(os.path.getsize(path))
+                except FileNotFoundError:
+                    pass
+                return True
+        return False
+
+    def evict(self):
+        """Deletes least recently used files until under the byte budget."""
+        with self._lock:
+            self._last_scan = time.monotonic()
+            self._added_since_scan = 0
+
+        files, total = [], 0
+        for root in self.areas.values():
+            with os.scandir(root) as it:
+                for entry in it:
+                    if not entry.is_file() or entry.name.endswith(".tmp"):
+                        continue
+                    st = entry.stat()
+                    files.append((st.st_mtime, st.st_size, entry.path))
+                    total += st.st_size
+
+        if total <= self.max_bytes:
+            return 0
+
+        files.sort()
+        evicted = 0
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # another worker got there first
+            total -= size
+            evicted += 1
+            self.stats["evicted"] += 1
+            self.stats["evicted_bytes"] += size
+        return evicted
@@ -0,0 +1,173 @@
+# backend/utils/artifact_writer.py
+import atexit
+import os
+import queue
+import random
+import threading
+import uuid
+
+import cv2
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+ARTIFACT_QUEUE_SIZE = int(os.getenv("ARTIFACT_QUEUE_SIZE", "64"))
+# Pixel bytes the queue may hold: full pages are MBs each, so the item
+# count alone does not bound memory (a 24 MP BGR page is ~72 MB)
+ARTIFACT_QUEUE_MB = float(os.getenv("ARTIFACT_QUEUE_MB", "64"))
+DEBUG_CROP_SAMPLE_RATE = float(os.getenv("DEBUG_CROP_SAMPLE_RATE", "0"))
+
+
+# =====================================================
+# BOUNDED BACKGROUND WRITER
+# =====================================================
+class ArtifactWriter:
+    """
+    Persists images (annotated pages, debug crops) on a daemon thread so
+    cv2.imwrite never runs on the request path. The queue is bounded by
+    item count (debug crops) and by pixel bytes (pages): when either is
+    full the item is dropped and counted instead of blocking.
+    Paths still in the queue can be waited for (wait_for), and whatever
+    is queued is flushed when the worker exits.
+    """
+
+    def __init__(self, max_queue=ARTIFACT_QUEUE_SIZE,
+                 sample_rate=DEBUG_CROP_SAMPLE_RATE, on_write=None,
+                 max_bytes=int(ARTIFACT_QUEUE_MB * 1024 * 1024)):
+        self.sample_rate = sample_rate
+        self.on_write = on_write   # called with each path written
+        self.max_bytes = max_bytes
+        self._queued_bytes = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pending = {}   # abs path -> Event set once it is written
+        self.stats = {
+            "queued": 0, "written": 0, "inline": 0,
+            "dropped": 0, "errors": 0, "waited": 0,
+            "queued_bytes": 0, "max_queued_bytes": 0
+        }
+        atexit.register(self.flush, timeout=30)
+
+    def _ensure_started(self):
+        # Started lazily so each forked gunicorn worker gets its own thread
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="artifact-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            path, image = self._queue.get()
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                if cv2.imwrite(path, image):
+                    self.stats["written"] += 1
+                    self._written(path)
+                else:
+                    self.stats["errors"] += 1
+            except Exception:
+                self.stats["errors"] += 1
+            finally:
+                self._release(image.nbytes)
+                self._done(path)
+                self._queue.task_done()
+
+    def _written(self, path):
+        if self.on_write is not None:
+            try:
+                self.on_write(path)
+            except Exception:
+                self.stats["errors"] += 1
+
+    def _reserve(self, nbytes):
+        with self._lock:
+            if self._queued_bytes + nbytes > self.max_bytes:
+                return False
+            self._queued_bytes += nbytes
+            self.stats["queued_bytes"] = self._queued_bytes
+            self.stats["max_queued_bytes"] = max(
+                self.stats["max_queued_bytes"], self._queued_bytes
+            )
+            return True
+
+    def _release(self, nbytes):
+        with self._lock:
+            self._queued_bytes -= nbytes
+            self.stats["queued_bytes"] = self._queued_bytes
+
+    def _done(self, path):
+        with self._lock:
+            event = self._pending.pop(os.path.abspath(path), None)
+        if event is not None:
+            event.set()
+
+    def submit(self, path, image, required=False):
+        """
+        Queue an image for writing. Returns False if it was dropped.
+        Required items (e.g. the annotated page a URL points at) are
+        written inline instead of being dropped when the queue is full.
+        """
+        self._ensure_started()
+        with self._lock:
+            self._pending.setdefault(os.path.abspath(path), threading.Event())
+        queued = self._reserve(image.nbytes)
+        if queued:
+            try:
+                self._queue.put_nowait((path, image))
+            except queue.Full:
+                self._release(image.nbytes)
+                queued = False
+
+        if not queued:
+            self._done(path)
+            if required:
+                self.stats["inline"] += 1
+                ok = cv2.imwrite(path, image)
+                if ok:
+                    self._written(path)
+                return ok
+            self.stats["dropped"] += 1
+            return False
+        self.stats["queued"] += 1
+        return True
+
+    def sample(self, base_dir, label, canvas):
+        """Keep a fraction of 28x28 canvases, grouped by predicted label."""
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return False
+        path = os.path.join(base_dir, str(label), f"{uuid.uuid4().hex}.png")
+        return self.submit(path, canvas.copy())
+
+    def wait_for(self, path, timeout=10):
+        """
+        If path is queued, block until it is written and return True.
+        False means no write of path is pending.
+        """
+        with self._lock:
+            event = self._pending.get(os.path.abspath(path))
+        if event is None:
+            return False
+        self.stats["waited"] += 1
+        return event.wait(timeout)
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far is on disk."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        q = self._queue
+        with q.all_tasks_done:
+            if timeout is None:
+                while q.unfinished_tasks:
+                    q.all_tasks_done.wait()
+            else:
+                q.all_tasks_done.wait_for(
+                    lambda: not q.unfinished_tasks, timeout
+                )
+
+
+artifact_writer = ArtifactWriter()
@@ -0,0 +1,123 @@
+# backend/utils/blank_detector.py
+import os
+
+import cv2
+import numpy as np
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+BLANK_MIN_CONTRAST = float(os.getenv("MCQ_BLANK_MIN_CONTRAST", "12"))
+BLANK_MIN_INK_RATIO = float(os.getenv("MCQ_BLANK_MIN_INK_RATIO", "0.02"))
+# Printed option boxes smaller than this (px) are never assumed empty
+BLANK_MIN_BOX_SIDE = int(os.getenv("MCQ_BLANK_MIN_BOX_SIDE", "24"))
+
+
+# =====================================================
+# EMPTY PRINTED BOX TEST
+# =====================================================
+def _filled(contour, shape):
+    mask = np.zeros(shape, dtype=np.uint8)
+    cv2.drawContours(mask, [contour], -1, 1, thickness=cv2.FILLED)
+    return mask
+
+
+def _rectangularity(mask, contour):
+    """Share of the contour's bounding box its filled area covers."""
+    x, y, w, h = cv2.boundingRect(contour)
+    return np.count_nonzero(mask) / float(max(1, w * h))
+
+
+def is_empty_box(comp, bin_img):
+    """
+    True only for a clearly printed, empty option box: a component
+    whose outer edge and single large hole are both rectangles and
+    whose hole holds no ink. Anything unclear (a thin "D" or "O" also
+    has a big hole) returns False, so the crop goes to the classifier.
+    comp is the component's mask, bin_img the crop's ink mask, same shape.
+    """
+    contours, hierarchy = cv2.findContours(
+        comp.astype(np.uint8), cv2.RETR_CCOMP, cv2.CHAIN_APPROX_SIMPLE
+    )
+    if hierarchy is None:
+        return False
+    hierarchy = hierarchy[0]
+    outers = [i for i, hr in enumerate(hierarchy) if hr[3] < 0]
+    holes = [i for i, hr in enumerate(hierarchy) if hr[3] >= 0]
+    if len(outers) != 1 or not holes:
+        return False
+
+    outer = contours[outers[0]]
+    hole = max((contours[i] for i in holes), key=cv2.contourArea)
+
+    _, _, box_w, box_h = cv2.boundingRect(outer)
+    if min(box_w, box_h) < BLANK_MIN_BOX_SIDE:
+        return False  # too small to tell from a letter
+
+    # Four straight sides outside and inside; letters with a bowl
+    # ("D", "O") stay around 0.94 or below, printed boxes above 0.98
+    peri = cv2.arcLength(outer, True)
+    if len(cv2.approxPolyDP(outer, 0.04 * peri, True)) != 4:
+        return False
+    outer_mask = _filled(outer, comp.shape)
+    hole_mask = _filled(hole, comp.shape)
+    if _rectangularity(outer_mask, outer) < 0.97:
+        return False
+    if _rectangularity(hole_mask, hole) < 0.97:
+        return False
+
+    # The hole must be most of the box (thin printed border) ...
+    if np.count_nonzero(hole_mask) < 0.5 * np.count_nonzero(outer_mask):
+        return False
+
+    # ... and empty: no ink of any other stroke inside it
+    inside = cv2.erode(hole_mask, np.ones((3, 3), np.uint8))
+    ink_inside = np.count_nonzero(bin_img[inside > 0])
+    return ink_inside <= 0.01 * max(1, np.count_nonzero(inside))
+
+
+# =====================================================
+# BLANK OPTION DETECTOR
+# =====================================================
+def detect_blank_option(crop_gray):
+    """
+    Cheap pre-check for an option crop before it goes to the letter CNN.
+    Uses contrast, Otsu ink density and connected-component stats.
+    Empty printed boxes (see is_empty_box) are not counted as ink.
+    Returns (is_blank, confidence) with confidence in [0, 1].
+    """
+    if crop_gray.size == 0:
+        return True, 1.0
+
+    h, w = crop_gray.shape[:2]
+
+    # Flat crop -> nothing written at all
+    contrast = float(crop_gray.std())
+    if contrast < BLANK_MIN_CONTRAST:
+        return True, round(1.0 - contrast / BLANK_MIN_CONTRAST, 3)
+
+    _, bin_img = cv2.threshold(
+        crop_gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU
+    )
+    n, labels, stats, _ = cv2.connectedComponentsWithStats(
+        bin_img, connectivity=8
+    )
+
+    min_area = max(4, int(0.003 * h * w))
+    ink = 0
+    for i in range(1, n):
+        x, y, cw, ch, area = stats[i]
+        if area < min_area:
+            continue  # speckle
+
+        if cw > 0.5 * w and ch > 0.5 * h and is_empty_box(
+            labels == i, bin_img
+        ):
+            continue  # empty printed box
+
+        ink += int(area)
+
+    ratio = ink / float(h * w)
+    if ratio < BLANK_MIN_INK_RATIO:
+        return True, round(1.0 - ratio / BLANK_MIN_INK_RATIO, 3)
+    return False, round(min(1.0, ratio / BLANK_MIN_INK_RATIO - 1.0), 3)
@@ -0,0 +1,142 @@
+# backend/utils/cache_versions.py
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import make_response
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+# How long a worker trusts its copy of a version counter. Bumps made by
+# this worker are seen at once; other workers' within this window.
+VERSION_CACHE_TTL = float(os.getenv("VERSION_CACHE_TTL", "1.0"))
+# Entries kept in the in-process response cache (0 = off)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "0"))
+
+
+# =====================================================
+# VERSION SCOPES
+# =====================================================
+def roster_scope(teacher_id):
+    return f"roster:{teacher_id}"
+
+
+def results_scope(teacher_id):
+    return f"results:{teacher_id}"
+
+
+def exam_scope(teacher_id, exam_code):
+    return f"exam:{teacher_id}:{exam_code}"
+
+
+# =====================================================
+# VERSION COUNTERS -> ETAGS
+# =====================================================
+class VersionStore:
+    """
+    Monotonic counters per scope (teacher roster, teacher results, one
+    exam) kept in Mongo and bumped by writes. Read endpoints derive
+    their ETag from the counters, so an unchanged poll can be answered
+    with 304 (or from the response cache) without running its query.
+    """
+
+    def __init__(self, col, ttl=VERSION_CACHE_TTL,
+                 cache_size=RESPONSE_CACHE_SIZE):
+        self.col = col
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._memo = {}                  # scope -> (version, fetched_at)
+        self._responses = OrderedDict()  # etag -> (body, status, headers)
+        self.stats = {"not_modified": 0, "cache_hits": 0, "misses": 0}
+
+    # -------------------------------------------------
+    def bump(self, *scopes):
+        now = time.monotonic()
+        for scope in scopes:
+            doc = self.col.find_one_and_update(
+                {"_id": scope}, {"$inc": {"v": 1}},
+                upsert=True, return_document=True
+            )
+            with self._lock:
+                self._memo[scope] = (doc["v"], now)
+
+    def get(self, scopes):
+        now = time.monotonic()
+        out, stale = {}, []
+        with self._lock:
+            for scope in scopes:
+                memo = self._memo.get(scope)
+                if memo and now - memo[1] < self.ttl:
+                    out[scope] = memo[0]
+                else:
+                    stale.append(scope)
+
+        if stale:
+            found = {
+                d["_id"]: d.get("v", 0)
+                for d in self.col.find({"_id": {"$in": stale}})
+            }
+            with self._lock:
+                for scope in stale:
+                    out[scope] = found.get(scope, 0)
+                    self._memo[scope] = (out[scope], now)
+        return out
+
+    def etag(self, req, scopes):
+        versions = self.get(scopes)
+        raw = "|".join(
+            [req.path, req.query_string.decode()] +
+            [f"{s}={versions[s]}" for s in sorted(versions)]
+        )
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    # -------------------------------------------------
+    def conditional(self, req, scopes):
+        """
+        Returns (etag, early_response). early_response is a 304 when the
+        client already has this version, or a cached copy of it.
+        """
+        etag = self.etag(req, scopes)
+
+        # Compressed responses carry "<etag>-gzip" / "<etag>-br"
+        known = (etag, f"{etag}-gzip", f"{etag}-br")
+        if any(t in req.if_none_match for t in known):
+            self.stats["not_modified"] += 1
+            resp = make_response("", 304)
+            resp.set_etag(etag)
+            return etag, resp
+
+        if self.cache_size > 0:
+            with self._lock:
+                hit = self._responses.get(etag)
+                if hit is not None:
+                    self._responses.move_to_end(etag)
+            if hit is not None:
+                self.stats["cache_hits"] += 1
+                body, status, headers = hit
+                resp = make_response(body, status, headers)
+                resp.set_etag(etag)
+                return etag, resp
+
+        self.stats["misses"] += 1
+        return etag, None
+
+    def finish(self, rv, etag):
+        resp = make_response(rv)
+        if resp.status_code != 200:
+            return resp
+
+        resp.set_etag(etag)
+        resp.headers["Cache-Control"] = "private, no-cache"
+
+        if self.cache_size > 0 and not resp.is_streamed:
+            headers = {"Content-Type": resp.headers["Content-Type"]}
+            with self._lock:
+                self._responses[etag] = (resp.get_data(), 200, headers)
+                while len(self._responses) > self.cache_size:
+                    self._responses.popitem(last=False)
+        return resp
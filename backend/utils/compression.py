@@ -0,0 +1,54 @@
+# backend/utils/compression.py
+import gzip
+import os
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+COMPRESS_MIMETYPES = {"application/json"}
+
+
+# =====================================================
+# GZIP / BROTLI FOR LARGE JSON BODIES
+# =====================================================
+def compress_response(response, accept_encoding):
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or response.is_streamed
+        or response.mimetype not in COMPRESS_MIMETYPES
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+
+    if brotli is not None and "br" in accept_encoding:
+        body, encoding = brotli.compress(data, quality=5), "br"
+    elif "gzip" in accept_encoding:
+        body, encoding = gzip.compress(data, compresslevel=6), "gzip"
+    else:
+        return response
+
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    # Same content, different bytes: keep validators distinct per encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak=weak)
+    return response
+
+
+def init_compression(app):
+    @app.after_request
+    def _compress(response):
+        return compress_response(response, request.accept_encodings)
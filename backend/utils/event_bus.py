@@ -0,0 +1,172 @@
+# backend/utils/event_bus.py
+import importlib
+import json
+import os
+import queue
+import threading
+from collections import deque
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+# "module:Class" of the bus implementation; the default lives in-process
+EVENT_BUS_BACKEND = os.getenv("EVENT_BUS_BACKEND", "utils.event_bus:LocalEventBus")
+# Events kept per channel for Last-Event-ID replay
+EVENT_REPLAY_SIZE = int(os.getenv("EVENT_REPLAY_SIZE", "500"))
+# /result/stream is opt-in: it needs a threaded (gthread) or ASGI
+# server, see gunicorn.conf.py
+SSE_ENABLED = os.getenv("SSE_ENABLED", "0") == "1"
+# Open streams per worker (0 = no limit); gunicorn.conf.py derives it
+# from its thread count
+SSE_MAX_STREAMS = int(os.getenv("SSE_MAX_STREAMS", "4"))
+# Seconds between keep-alive comments on an idle stream, kept well
+# under the server's worker timeout
+SSE_HEARTBEAT_SECONDS = min(
+    float(os.getenv("SSE_HEARTBEAT_SECONDS", "15")),
+    int(os.getenv("GUNICORN_TIMEOUT", "120")) / 4.0
+)
+# Events buffered per subscriber before a slow client is dropped
+EVENT_SUBSCRIBER_QUEUE = int(os.getenv("EVENT_SUBSCRIBER_QUEUE", "1000"))
+
+
+# =====================================================
+# PUBLISH / SUBSCRIBE
+# =====================================================
+class Subscription:
+    """
+    replay: events missed since last_event_id (oldest first).
+    reset: last_event_id is older than the replay window; the client
+    should reload the full list instead of applying deltas.
+    """
+
+    def __init__(self, bus, channel, replay, reset, maxsize):
+        self.bus = bus
+        self.channel = channel
+        self.replay = replay
+        self.reset = reset
+        self.queue = queue.Queue(maxsize)
+        self.dropped = False
+
+    def get(self, timeout):
+        """Next (event_id, event_type, data), or None on timeout."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class LocalEventBus:
+    """
+    In-process bus: numbered events per channel, a ring buffer for
+    replay, and one bounded queue per subscriber. Only subscribers in
+    the same worker see an event; a shared bus (e.g. Redis pub/sub)
+    implements the same publish/subscribe/unsubscribe methods.
+    """
+
+    def __init__(self, replay_size=EVENT_REPLAY_SIZE,
+                 queue_size=EVENT_SUBSCRIBER_QUEUE):
+        self.replay_size = replay_size
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._seq = {}       # channel -> last event id
+        self._history = {}   # channel -> deque of events
+        self._subs = {}      # channel -> set of subscriptions
+        self.stats = {"published": 0, "delivered": 0, "dropped_subscribers": 0}
+
+    def publish(self, channel, event_type, data):
+        with self._lock:
+            event_id = self._seq.get(channel, 0) + 1
+            self._seq[channel] = event_id
+            event = (event_id, event_type, data)
+            history = self._history.get(channel)
+            if history is None:
+                history = self._history[channel] = deque(maxlen=self.replay_size)
+            history.append(event)
+            subs = list(self._subs.get(channel, ()))
+            self.stats["published"] += 1
+
+        for sub in subs:
+            try:
+                sub.queue.put_nowait(event)
+                self.stats["delivered"] += 1
+            except queue.Full:
+                # Slow client: cut it off rather than grow without bound
+                sub.dropped = True
+                self.unsubscribe(sub)
+                self.stats["dropped_subscribers"] += 1
+        return event_id
+
+    def subscribe(self, channel, last_event_id=None):
+        with self._lock:
+            history = list(self._history.get(channel, ()))
+            last = self._seq.get(channel, 0)
+            replay, reset = [], False
+            if last_event_id is not None:
+                oldest = history[0][0] if history else last + 1
+                # Gap past the ring buffer, or ids from another worker/restart
+                reset = last_event_id < oldest - 1 or last_event_id > last
+                if not reset:
+                    replay = [e for e in history if e[0] > last_event_id]
+
+            sub = Subscription(self, channel, replay, reset, self.queue_size)
+            self._subs.setdefault(channel, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subs.get(sub.channel)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.channel]
+
+    def subscribers(self):
+        with self._lock:
+            return sum(len(s) for s in self._subs.values())
+
+
+def make_event_bus(backend=EVENT_BUS_BACKEND):
+    module, _, cls = backend.partition(":")
+    return getattr(importlib.import_module(module), cls)()
+
+
+def result_delta(doc):
+    """The slice of a result a class dashboard needs to update one row."""
+    ts = doc.get("timestamp")
+    return {
+        "usn": doc["usn"],
+        "exam_code": doc["exam_code"],
+        "score": doc.get("score", 0),
+        "total": doc.get("total", 0),
+        "percentage": doc.get("percentage", 0),
+        "timestamp": ts.isoformat() if ts else None,
+    }
+
+
+# =====================================================
+# SERVER-SENT EVENTS
+# =====================================================
+def format_sse(event_id, event_type, data):
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_events(sub, heartbeat=SSE_HEARTBEAT_SECONDS, retry_ms=3000):
+    """Yields the SSE wire format for a subscription until it is dropped."""
+    try:
+        yield f"retry: {retry_ms}\n\n"
+        if sub.reset:
+            yield "event: reset\ndata: {}\n\n"
+        for event in sub.replay:
+            yield format_sse(*event)
+
+        while not sub.dropped:
+            event = sub.get(timeout=heartbeat)
+            if event is None:
+                yield ": ping\n\n"
+            else:
+                yield format_sse(*event)
+    finally:
+        sub.close()
@@ -0,0 +1,219 @@
+# backend/utils/exam_stats.py
+import math
+import uuid
+
+from pymongo import ReplaceOne, UpdateOne
+
+RESULT_TYPES = ("Correct", "Wrong", "NotAttempted")
+
+
+# =====================================================
+# DELTAS (ONE RESULT DOCUMENT -> $inc FIELDS)
+# =====================================================
+def _add_result(inc, result, sign):
+    score = int(result.get("score", 0) or 0)
+    _bump(inc, "count", sign)
+    _bump(inc, "sum", sign * score)
+    _bump(inc, "sum_sq", sign * score * score)
+    _bump(inc, f"hist.{score}", sign)
+
+    for row in result.get("results", []):
+        q = str(row.get("question_pred", ""))
+        kind = row.get("result")
+        if q.isdigit() and kind in RESULT_TYPES:
+            _bump(inc, f"questions.{q}.{kind}", sign)
+
+
+def _bump(inc, field, value):
+    inc[field] = inc.get(field, 0) + value
+
+
+def _stats_key(result):
+    return (result.get("teacher_id"), result.get("exam_code"))
+
+
+def stats_updates(old, new):
+    """
+    Turns a result upsert into (filter, update) pairs for the per-exam
+    summary: subtracts the old document (re-grade) and adds the new one.
+    """
+    incs = {}
+    if old:
+        _add_result(incs.setdefault(_stats_key(old), {}), old, -1)
+    if new:
+        _add_result(incs.setdefault(_stats_key(new), {}), new, +1)
+
+    updates = []
+    for (teacher_id, exam_code), inc in incs.items():
+        inc = {k: v for k, v in inc.items() if v != 0}
+        if not inc:
+            continue  # identical re-grade
+        update = {"$inc": inc}
+        if new and _stats_key(new) == (teacher_id, exam_code):
+            update["$set"] = {"total": new.get("total", 0)}
+        updates.append(
+            ({"teacher_id": teacher_id, "exam_code": exam_code}, update)
+        )
+    return updates
+
+
+def record_result_change(stats_col, old, new):
+    """Applies stats_updates() as atomic upserting $inc updates."""
+    for flt, update in stats_updates(old, new):
+        stats_col.update_one(flt, update, upsert=True)
+
+
+def record_result_changes(stats_col, changes):
+    """
+    record_result_change() for many (old, new) pairs at once: the
+    updates are merged per exam and sent as one unordered bulk_write.
+    """
+    merged = {}
+    for old, new in changes:
+        for flt, update in stats_updates(old, new):
+            key = (flt["teacher_id"], flt["exam_code"])
+            into = merged.setdefault(key, (flt, {"$inc": {}}))[1]
+            for field, value in update["$inc"].items():
+                _bump(into["$inc"], field, value)
+            if "$set" in update:
+                into["$set"] = update["$set"]
+
+    ops = []
+    for flt, update in merged.values():
+        update["$inc"] = {k: v for k, v in update["$inc"].items() if v != 0}
+        if not update["$inc"]:
+            del update["$inc"]
+        if update:
+            ops.append(UpdateOne(flt, update, upsert=True))
+    if ops:
+        stats_col.bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+# =====================================================
+# REBUILD FROM SCRATCH
+# =====================================================
+def rebuild_stats(results_col, stats_col, query=None):
+    """
+    Recomputes summaries for every exam matched by query. Readers never
+    see a summary missing: a full rebuild is built in a temporary
+    collection renamed over stats_col, a scoped one (teacher / exam)
+    replaces its summaries in place and then drops the orphans.
+    """
+    totals = {}
+    for r in results_col.find(
+        query or {},
+        {"teacher_id": 1, "exam_code": 1, "score": 1, "total": 1,
+         "results.question_pred": 1, "results.result": 1}
+    ):
+        key = _stats_key(r)
+        inc = totals.setdefault(key, {"inc": {}, "total": 0})
+        _add_result(inc["inc"], r, +1)
+        inc["total"] = r.get("total", inc["total"])
+
+    docs = []
+    for (teacher_id, exam_code), data in totals.items():
+        doc = {"teacher_id": teacher_id, "exam_code": exam_code,
+               "total": data["total"], "hist": {}, "questions": {}}
+        for field, value in data["inc"].items():
+            _set_path(doc, field, value)
+        docs.append(doc)
+
+    scope = {
+        k: v for k, v in (query or {}).items()
+        if k in ("teacher_id", "exam_code")
+    }
+    if scope:
+        _replace_scoped(stats_col, scope, docs)
+    else:
+        _swap_in(stats_col, docs)
+    return len(docs)
+
+
+def _replace_scoped(stats_col, scope, docs):
+    # Swapping the whole collection would lose concurrent $inc updates
+    # to exams outside the scope, so rebuild these in place
+    keys = [
+        {"teacher_id": d["teacher_id"], "exam_code": d["exam_code"]}
+        for d in docs
+    ]
+    if docs:
+        stats_col.bulk_write(
+            [ReplaceOne(k, d, upsert=True) for k, d in zip(keys, docs)],
+            ordered=False
+        )
+    # Drop summaries of exams that no longer have any results
+    stats_col.delete_many({**scope, "$nor": keys} if keys else scope)
+
+
+def _swap_in(stats_col, docs):
+    tmp = stats_col.database[
+        f"{stats_col.name}_rebuild_{uuid.uuid4().hex[:8]}"
+    ]
+    try:
+        for name, spec in stats_col.index_information().items():
+            if name != "_id_":
+                tmp.create_index(
+                    spec["key"], name=name, unique=spec.get("unique", False)
+                )
+        if docs:
+            tmp.insert_many(docs)
+        tmp.rename(stats_col.name, dropTarget=True)
+    except Exception:
+        tmp.drop()
+        raise
+
+
+def _set_path(doc, dotted, value):
+    parts = dotted.split(".")
+    for p in parts[:-1]:
+        doc = doc.setdefault(p, {})
+    doc[parts[-1]] = value
+
+
+# =====================================================
+# O(1) READS
+# =====================================================
+def percentile_rank(doc, score):
+    """Share of students strictly below score plus half of those tied."""
+    count = doc.get("count", 0)
+    if count <= 0:
+        return None
+    below = equal = 0
+    for s, n in doc.get("hist", {}).items():
+        s = int(s)
+        if s < score:
+            below += n
+        elif s == score:
+            equal += n
+    return round((below + 0.5 * equal) / count * 100, 2)
+
+
+def summarize(doc, score=None):
+    count = doc.get("count", 0)
+    mean = doc.get("sum", 0) / count if count else 0
+    var = doc.get("sum_sq", 0) / count - mean * mean if count else 0
+
+    hist = {
+        int(s): n for s, n in doc.get("hist", {}).items() if n
+    }
+    questions = {
+        q: {kind: tally.get(kind, 0) for kind in RESULT_TYPES}
+        for q, tally in sorted(
+            doc.get("questions", {}).items(), key=lambda kv: int(kv[0])
+        )
+    }
+
+    out = {
+        "exam_code": doc.get("exam_code"),
+        "count": count,
+        "total": doc.get("total", 0),
+        "mean": round(mean, 3),
+        "stddev": round(math.sqrt(max(var, 0.0)), 3),
+        "histogram": [{"score": s, "count": hist[s]} for s in sorted(hist)],
+        "questions": questions,
+    }
+    if score is not None:
+        out["score"] = score
+        out["percentile_rank"] = percentile_rank(doc, score)
+    return out
@@ -0,0 +1,140 @@
+# backend/utils/item_analysis.py
+import math
+
+# Kelley's upper / lower groups for the discrimination index
+GROUP_FRACTION = 0.27
+
+
+# =====================================================
+# MONGO AGGREGATION (ONE ROUND TRIP)
+# =====================================================
+def item_analysis_pipeline(query):
+    """
+    Per question: p-value (share correct), option choice distribution and
+    discrimination index (upper 27% correct - lower 27% correct) / group
+    size. Needs MongoDB 5.0+ for $setWindowFields.
+    """
+    correct = {"$eq": ["$results.result", "Correct"]}
+    return [
+        {"$match": query},
+        {"$project": {
+            "score": 1,
+            "results.question_pred": 1,
+            "results.option_pred": 1,
+            "results.result": 1,
+        }},
+        # Rank students by score to find the upper / lower groups
+        {"$setWindowFields": {
+            "sortBy": {"score": -1, "_id": 1},
+            "output": {
+                "rank": {"$documentNumber": {}},
+                "n": {"$count": {}},
+            },
+        }},
+        {"$set": {"g": {"$ceil": {"$multiply": ["$n", GROUP_FRACTION]}}}},
+        {"$set": {"group": {"$switch": {
+            "branches": [
+                {"case": {"$lte": ["$rank", "$g"]}, "then": "upper"},
+                {"case": {"$gt": ["$rank", {"$subtract": ["$n", "$g"]}]},
+                 "then": "lower"},
+            ],
+            "default": "middle",
+        }}}},
+        {"$unwind": "$results"},
+        {"$group": {
+            "_id": {
+                "q": "$results.question_pred",
+                "opt": "$results.option_pred",
+            },
+            "chosen": {"$sum": 1},
+            "correct": {"$sum": {"$cond": [correct, 1, 0]}},
+            "upper_correct": {"$sum": {"$cond": [
+                {"$and": [correct, {"$eq": ["$group", "upper"]}]}, 1, 0
+            ]}},
+            "lower_correct": {"$sum": {"$cond": [
+                {"$and": [correct, {"$eq": ["$group", "lower"]}]}, 1, 0
+            ]}},
+            "n": {"$first": "$n"},
+            "g": {"$first": "$g"},
+        }},
+        {"$group": {
+            "_id": "$_id.q",
+            "options": {"$push": {"option": "$_id.opt", "count": "$chosen"}},
+            "responses": {"$sum": "$chosen"},
+            "correct": {"$sum": "$correct"},
+            "upper_correct": {"$sum": "$upper_correct"},
+            "lower_correct": {"$sum": "$lower_correct"},
+            "n": {"$first": "$n"},
+            "g": {"$first": "$g"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "question": "$_id",
+            "responses": 1,
+            "options": 1,
+            "p_value": {"$round": [{"$divide": ["$correct", "$n"]}, 4]},
+            "discrimination": {"$round": [{"$divide": [
+                {"$subtract": ["$upper_correct", "$lower_correct"]}, "$g"
+            ]}, 4]},
+        }},
+    ]
+
+
+def item_analysis(results_col, query):
+    rows = list(results_col.aggregate(item_analysis_pipeline(query)))
+    return _finish(rows)
+
+
+# =====================================================
+# PYTHON EQUIVALENT (BENCHMARK BASELINE)
+# =====================================================
+def item_analysis_python(results_col, query):
+    docs = sorted(
+        results_col.find(query, {"score": 1, "results": 1}),
+        key=lambda d: (-(d.get("score") or 0), d["_id"])
+    )
+    n = len(docs)
+    if n == 0:
+        return []
+    g = math.ceil(n * GROUP_FRACTION)
+
+    per_q = {}
+    for rank, doc in enumerate(docs, start=1):
+        group = "upper" if rank <= g else (
+            "lower" if rank > n - g else "middle"
+        )
+        for r in doc.get("results", []):
+            item = per_q.setdefault(r.get("question_pred"), {
+                "options": {}, "responses": 0, "correct": 0,
+                "upper_correct": 0, "lower_correct": 0,
+            })
+            opt = r.get("option_pred")
+            item["options"][opt] = item["options"].get(opt, 0) + 1
+            item["responses"] += 1
+            if r.get("result") == "Correct":
+                item["correct"] += 1
+                if group != "middle":
+                    item[f"{group}_correct"] += 1
+
+    rows = [{
+        "question": q,
+        "responses": item["responses"],
+        "options": [
+            {"option": o, "count": c} for o, c in item["options"].items()
+        ],
+        "p_value": round(item["correct"] / n, 4),
+        "discrimination": round(
+            (item["upper_correct"] - item["lower_correct"]) / g, 4
+        ),
+    } for q, item in per_q.items()]
+    return _finish(rows)
+
+
+def _finish(rows):
+    def q_order(row):
+        q = str(row["question"])
+        return (0, int(q)) if q.isdigit() else (1, q)
+
+    for row in rows:
+        row["options"].sort(key=lambda o: (o["option"] or "~"))
+    return sorted(rows, key=q_order)
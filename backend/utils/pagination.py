@@ -0,0 +1,142 @@
+# backend/utils/pagination.py
+import base64
+import json
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from flask import Response, current_app, jsonify
+
+MAX_PAGE_LIMIT = 1000
+
+
+# =====================================================
+# CURSOR ENCODING (OPAQUE TO CLIENTS)
+# =====================================================
+def encode_cursor(last_id):
+    raw = json.dumps({"after": str(last_id)}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return ObjectId(data["after"])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        return None
+
+
+# =====================================================
+# QUERY-STRING PARSING
+# =====================================================
+def page_args(req):
+    """
+    Reads ?limit=&cursor= from the request.
+    Returns (limit, after_id, error). limit is None when not given, which
+    keeps the old "return everything" behaviour for existing clients.
+    """
+    limit = req.args.get("limit")
+    cursor = req.args.get("cursor")
+
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            return None, None, "limit must be an integer"
+        if limit < 1:
+            return None, None, "limit must be positive"
+        limit = min(limit, MAX_PAGE_LIMIT)
+
+    after_id = None
+    if cursor:
+        after_id = decode_cursor(cursor)
+        if after_id is None:
+            return None, None, "Invalid cursor"
+
+    return limit, after_id, None
+
+
+def projection_args(req, base=None):
+    """
+    ?fields=usn,score   -> only those fields
+    ?exclude=results    -> everything but those fields
+    _id is always fetched (needed for the cursor) and stripped on output.
+    """
+    projection = dict(base or {})
+    fields = [f for f in req.args.get("fields", "").split(",") if f.strip()]
+    exclude = [f for f in req.args.get("exclude", "").split(",") if f.strip()]
+
+    if fields:
+        projection = {f.strip(): 1 for f in fields}
+    elif exclude:
+        projection.update({f.strip(): 0 for f in exclude})
+
+    projection.pop("_id", None)
+    return projection or None
+
+
+# =====================================================
+# PAGINATED / STREAMED LIST RESPONSE
+# =====================================================
+def list_response(req, collection, query, key, projection=None,
+                  transform=None):
+    """
+    Keyset pagination on _id plus optional streaming.
+
+    ?stream=ndjson -> one JSON document per line, last line holds the cursor
+    ?stream=json   -> the usual {"<key>": [...]} body, encoded as it goes
+    otherwise      -> a normal jsonify response
+    """
+    limit, after_id, error = page_args(req)
+    if error:
+        return jsonify({"error": error}), 400
+
+    if after_id is not None:
+        query = {**query, "_id": {"$gt": after_id}}
+
+    cursor = collection.find(query, projection).sort("_id", 1)
+    if limit is not None:
+        # One extra row tells us whether there is another page
+        cursor = cursor.limit(limit + 1)
+
+    state = {"count": 0, "last_id": None, "more": False}
+
+    def rows():
+        for doc in cursor:
+            if limit is not None and state["count"] == limit:
+                state["more"] = True
+                break
+            state["count"] += 1
+            state["last_id"] = doc.pop("_id", None)
+            yield transform(doc) if transform else doc
+
+    def next_cursor():
+        if state["more"] and state["last_id"] is not None:
+            return encode_cursor(state["last_id"])
+        return None
+
+    mode = req.args.get("stream", "").lower()
+    dumps = current_app.json.dumps
+
+    if mode == "ndjson":
+        def generate():
+            for doc in rows():
+                yield dumps(doc) + "\n"
+            yield dumps({"next_cursor": next_cursor()}) + "\n"
+        return Response(generate(), mimetype="application/x-ndjson")
+
+    if mode == "json":
+        def generate():
+            yield '{"%s": [' % key
+            first = True
+            for doc in rows():
+                yield ("" if first else ",") + dumps(doc)
+                first = False
+            yield '], "next_cursor": %s}' % dumps(next_cursor())
+        return Response(generate(), mimetype="application/json")
+
+    items = list(rows())
+    body = {key: items}
+    if limit is not None:
+        body["next_cursor"] = next_cursor()
+    return jsonify(body), 200
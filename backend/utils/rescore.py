@@ -0,0 +1,101 @@
+# backend/utils/rescore.py
+import numpy as np
+from pymongo import UpdateOne
+
+from utils.exam_stats import rebuild_stats
+from utils.scoring import keyed_rows
+
+# Response codes per scored row
+BLANK, OTHER = 1, 6
+OPTION_CODES = {"A": 2, "B": 3, "C": 4, "D": 5}
+RESULT_NAMES = np.array(["", "NotAttempted", "Correct", "Wrong"], dtype=object)
+
+
+# =====================================================
+# VECTORIZED SCORING
+# =====================================================
+def _rows_of(doc):
+    # Older results only kept the rows that matched the key at the time
+    return doc.get("recognitions") or doc.get("results") or []
+
+
+def _option_code(option):
+    if not option:
+        return BLANK
+    return OPTION_CODES.get(option, OTHER)
+
+
+def score_matrix(docs, answer_key):
+    """
+    Scores every keyed row of every doc against answer_key in NumPy, with
+    the same rules as grade_page: each row is scored on its own, so a
+    question read twice on a page counts twice.
+    Returns a list of (doc _id, {score, total, percentage, results}).
+    """
+    questions = list(answer_key)
+    col = {q: j for j, q in enumerate(questions)}
+    n, total = len(docs), len(questions)
+
+    rows = [keyed_rows(_rows_of(doc), answer_key) for doc in docs]
+    flat = [r for doc_rows in rows for r in doc_rows]
+    owner = np.repeat(np.arange(n), [len(doc_rows) for doc_rows in rows])
+
+    key_row = np.array(
+        [OPTION_CODES.get(answer_key[q], -1) for q in questions], dtype=np.int8
+    )
+    expected = key_row[
+        np.array([col[r["question_pred"]] for r in flat], dtype=np.intp)
+    ]
+    responses = np.array(
+        [_option_code(r.get("option_pred")) for r in flat], dtype=np.int8
+    )
+    correct = responses == expected
+
+    # 1 not attempted, 2 correct, 3 wrong
+    outcome = np.where(correct, 2, np.where(responses > BLANK, 3, 1))
+    scores = np.bincount(owner, weights=correct, minlength=n).astype(int)
+    percentages = (
+        np.round(scores / total * 100, 2) if total > 0 else np.zeros(n)
+    )
+
+    updates = []
+    k = 0
+    for i, doc in enumerate(docs):
+        results = []
+        for r in rows[i]:
+            results.append({
+                "question_pred": r["question_pred"],
+                "option_pred": r.get("option_pred", ""),
+                "result": RESULT_NAMES[outcome[k]]
+            })
+            k += 1
+        updates.append((doc["_id"], {
+            "score": int(scores[i]),
+            "total": total,
+            "percentage": float(percentages[i]),
+            "results": results
+        }))
+    return updates
+
+
+# =====================================================
+# RE-SCORE ONE EXAM (ONE READ, ONE BULK WRITE)
+# =====================================================
+def rescore_exam(results_col, stats_col, exam_code, teacher_id, answer_key):
+    query = {"exam_code": exam_code, "teacher_id": teacher_id}
+    docs = list(results_col.find(
+        query, {"recognitions": 1, "results.question_pred": 1,
+                "results.option_pred": 1}
+    ))
+    if not docs:
+        return 0
+
+    updates = score_matrix(docs, answer_key)
+    results_col.bulk_write(
+        [UpdateOne({"_id": _id}, {"$set": fields}) for _id, fields in updates],
+        ordered=False
+    )
+
+    # Scores moved, so the per-exam analytics need recomputing
+    rebuild_stats(results_col, stats_col, query)
+    return len(updates)
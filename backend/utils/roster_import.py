@@ -0,0 +1,168 @@
+# backend/utils/roster_import.py
+import codecs
+import csv
+import zipfile
+
+from pymongo.errors import BulkWriteError
+
+ROSTER_FIELDS = ["usn", "name", "department", "batch", "section"]
+INSERT_CHUNK = 1000
+DUPLICATE_KEY = 11000
+
+
+# =====================================================
+# ROW READERS (STREAMING – ONE ROW AT A TIME)
+# =====================================================
+def _csv_rows(stream):
+    reader = csv.reader(codecs.iterdecode(stream, "utf-8-sig"))
+    try:
+        header = next(reader, None)
+        if header is None:
+            return
+        yield header
+        for row in reader:
+            yield row
+    except csv.Error as e:
+        raise ValueError(f"Malformed CSV at line {reader.line_num}: {e}")
+
+
+def _xlsx_rows(stream):
+    from openpyxl import load_workbook
+
+    try:
+        wb = load_workbook(stream, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, KeyError, OSError) as e:
+        # Not a zip, or a zip without a workbook in it
+        raise ValueError(f"Not a valid .xlsx file: {e}")
+    try:
+        for row in wb.active.iter_rows(values_only=True):
+            yield ["" if v is None else str(v) for v in row]
+    finally:
+        wb.close()
+
+
+def read_roster(stream, filename):
+    """
+    Yields (row_number, {field: value}) for every data row.
+    Header names are matched case-insensitively against ROSTER_FIELDS.
+    """
+    ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    if ext == "csv":
+        rows = _csv_rows(stream)
+    elif ext in ("xlsx", "xlsm"):
+        rows = _xlsx_rows(stream)
+    else:
+        raise ValueError("Allowed: csv, xlsx")
+
+    header = next(rows, None)
+    if not header:
+        raise ValueError("Roster is empty")
+
+    columns = [str(h).strip().lower() for h in header]
+    if "usn" not in columns or "name" not in columns:
+        raise ValueError("Roster needs usn and name columns")
+
+    for number, row in enumerate(rows, start=2):
+        values = dict(zip(columns, row))
+        if not any(str(v).strip() for v in values.values()):
+            continue  # blank spreadsheet line
+        yield number, {f: str(values.get(f, "") or "").strip()
+                       for f in ROSTER_FIELDS}
+
+
+# =====================================================
+# VALIDATE + UNORDERED BULK INSERT
+# =====================================================
+def has_unique_usn_index(collection):
+    for spec in collection.index_information().values():
+        fields = sorted(k for k, _ in spec["key"])
+        if spec.get("unique") and fields == ["teacher_id", "usn"]:
+            return True
+    return False
+
+
+def import_roster(collection, rows, teacher_id):
+    """
+    Validates rows in one pass and writes them with unordered insert_many.
+    Duplicates already in the DB are detected by the unique
+    (usn, teacher_id) index, not by per-row lookups; if that index is
+    missing, each chunk's USNs are checked with one $in query instead.
+    Returns a report with one entry per row. If the file turns out to be
+    unreadable part way (ValueError from rows), the rows before it are
+    still written and the report carries "error".
+    """
+    report = []
+    seen = set()
+    pending = []  # (report index, document)
+    check_existing = not has_unique_usn_index(collection)
+
+    def flush():
+        if check_existing and pending:
+            existing = {d["usn"] for d in collection.find(
+                {"teacher_id": teacher_id,
+                 "usn": {"$in": [doc["usn"] for _, doc in pending]}},
+                {"usn": 1}
+            )}
+            for idx, doc in pending:
+                if doc["usn"] in existing:
+                    report[idx]["status"] = "duplicate"
+            pending[:] = [p for p in pending if p[1]["usn"] not in existing]
+
+        if not pending:
+            return
+        docs = [doc for _, doc in pending]
+        failed = {}
+        try:
+            collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for err in e.details.get("writeErrors", []):
+                failed[err["index"]] = err
+        for i, (idx, _) in enumerate(pending):
+            err = failed.get(i)
+            if err is None:
+                report[idx]["status"] = "inserted"
+            elif err.get("code") == DUPLICATE_KEY:
+                report[idx]["status"] = "duplicate"
+            else:
+                report[idx]["status"] = "invalid"
+                report[idx]["error"] = err.get("errmsg", "Write failed")
+        pending.clear()
+
+    error = None
+    try:
+        for number, values in rows:
+            usn = values["usn"].upper()
+            entry = {"row": number, "usn": usn}
+            report.append(entry)
+
+            if not usn or not values["name"]:
+                entry["status"] = "invalid"
+                entry["error"] = "USN and Name are required"
+                continue
+
+            if usn in seen:
+                entry["status"] = "duplicate"
+                continue
+            seen.add(usn)
+
+            pending.append((len(report) - 1, {
+                **values,
+                "usn": usn,
+                "teacher_id": teacher_id
+            }))
+            if len(pending) >= INSERT_CHUNK:
+                flush()
+    except ValueError as e:
+        # Earlier chunks are already stored: report them with the error
+        error = str(e)
+
+    flush()
+
+    summary = {"inserted": 0, "duplicate": 0, "invalid": 0}
+    for entry in report:
+        summary[entry["status"]] += 1
+
+    out = {**summary, "rows": report}
+    if error:
+        out["error"] = error
+    return out
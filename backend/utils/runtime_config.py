@@ -0,0 +1,81 @@
+# backend/utils/runtime_config.py
+import os
+
+# =====================================================
+# CONFIGURATION (PER WORKER PROCESS)
+# =====================================================
+# 0 = leave the library default
+TF_INTRA_OP_THREADS = int(os.getenv("TF_INTRA_OP_THREADS", "0"))
+TF_INTER_OP_THREADS = int(os.getenv("TF_INTER_OP_THREADS", "0"))
+CV_THREADS = int(os.getenv("CV_THREADS", "-1"))
+# "", "auto" (split cores between workers) or a list such as "0-3,8"
+CPU_AFFINITY = os.getenv("CPU_AFFINITY", "").strip()
+
+_configured = False
+
+
+def parse_cpu_list(spec):
+    cpus = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            cpus.update(range(int(lo), int(hi) + 1))
+        else:
+            cpus.add(int(part))
+    return cpus
+
+
+def worker_cpus(index, workers, available):
+    """Contiguous slice of the available cores for worker `index`."""
+    cores = sorted(available)
+    if workers <= 1 or len(cores) < workers:
+        return set(cores)
+    per = len(cores) // workers
+    start = (index % workers) * per
+    return set(cores[start:start + per])
+
+
+def apply_affinity(spec=CPU_AFFINITY):
+    if not spec or not hasattr(os, "sched_setaffinity"):
+        return None
+    if spec == "auto":
+        index = os.getenv("WORKER_INDEX")
+        if index is None:
+            # Imported in the gunicorn master (--preload) or outside a
+            # worker: pinning here would be inherited by every worker
+            return None
+        workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+        cpus = worker_cpus(int(index), workers, os.sched_getaffinity(0))
+    else:
+        cpus = parse_cpu_list(spec)
+    os.sched_setaffinity(0, cpus)
+    return cpus
+
+
+def configure_runtime(tf=None, cv2=None):
+    """
+    Applies thread counts and CPU affinity once per process. Must run
+    before TensorFlow executes its first op, or its pool sizes are fixed.
+    """
+    global _configured
+    if _configured:
+        return
+    _configured = True
+
+    apply_affinity()
+
+    if cv2 is not None and CV_THREADS >= 0:
+        cv2.setNumThreads(CV_THREADS)
+
+    if tf is not None:
+        if TF_INTRA_OP_THREADS > 0:
+            tf.config.threading.set_intra_op_parallelism_threads(
+                TF_INTRA_OP_THREADS
+            )
+        if TF_INTER_OP_THREADS > 0:
+            tf.config.threading.set_inter_op_parallelism_threads(
+                TF_INTER_OP_THREADS
+            )
@@ -0,0 +1,150 @@
+# backend/utils/scan_session.py
+import os
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+SCAN_SESSION_TTL = int(os.getenv("SCAN_SESSION_TTL", "900"))
+# How long a worker serves a session from memory before re-checking it
+SCAN_SESSION_LOCAL_TTL = float(os.getenv("SCAN_SESSION_LOCAL_TTL", "30"))
+
+
+# =====================================================
+# SCAN SESSIONS (ONE PREFLIGHT, MANY /grade CALLS)
+# =====================================================
+class ScanSessionStore:
+    """
+    A scan session pins a teacher, an exam, its answer key and the valid
+    USN set for a short time. Sessions live in Mongo (TTL index on
+    expires_at) so every worker can resolve them, and each worker keeps
+    the ones it has seen in memory, so /grade needs no DB round trips
+    for a sheet in a known session. The session id is only honoured
+    together with its teacher's JWT (see check_sheet).
+    """
+
+    def __init__(self, col, ttl=SCAN_SESSION_TTL,
+                 local_ttl=SCAN_SESSION_LOCAL_TTL):
+        self.col = col
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self._lock = threading.Lock()
+        self._local = {}   # session_id -> (session, checked_at)
+        self._pruned_at = time.monotonic()
+
+    def create(self, db, teacher_id, exam_code, usns=None):
+        """
+        Validates exam, key and roster once. Returns (session, error).
+        usns optionally narrows the session to part of the roster.
+        """
+        if not db.exams.find_one(
+            {"exam_code": exam_code, "teacher_id": teacher_id}, {"_id": 1}
+        ):
+            return None, "Exam not found or unauthorized"
+
+        key_doc = db.answer_keys.find_one(
+            {"exam_code": exam_code, "teacher_id": teacher_id},
+            {"answer_key": 1}
+        )
+        if not key_doc:
+            return None, "Answer key not found"
+
+        query = {"teacher_id": teacher_id}
+        if usns:
+            query["usn"] = {"$in": [u.strip().upper() for u in usns]}
+        roster = [d["usn"] for d in db.students.find(query, {"usn": 1})]
+        if not roster:
+            return None, "No students found"
+
+        session = {
+            "_id": secrets.token_urlsafe(24),
+            "teacher_id": teacher_id,
+            "exam_code": exam_code,
+            "answer_key": key_doc["answer_key"],
+            "usns": roster,
+            "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl),
+        }
+        self.col.insert_one(session)
+        self._remember(session)
+        return session, None
+
+    def _remember(self, session):
+        session = {**session, "usns": set(session["usns"])}
+        now = time.monotonic()
+        with self._lock:
+            self._local[session["_id"]] = (session, now)
+            if now - self._pruned_at >= self.local_ttl:
+                self._prune(now)
+        return session
+
+    def _prune(self, now):
+        # Entries past local_ttl are re-read from Mongo anyway, so
+        # dropping them only bounds memory. Caller holds the lock.
+        self._pruned_at = now
+        utc_now = datetime.utcnow()
+        for sid, (s, checked_at) in list(self._local.items()):
+            if now - checked_at >= self.local_ttl or s["expires_at"] <= utc_now:
+                del self._local[sid]
+
+    def peek(self, session_id):
+        """The session if this worker checked it recently, else None."""
+        with self._lock:
+            hit = self._local.get(session_id)
+        if not hit:
+            return None
+        session, checked_at = hit
+        if session["expires_at"] <= datetime.utcnow():
+            self.drop_local(session_id)
+            return None
+        if time.monotonic() - checked_at >= self.local_ttl:
+            return None
+        return session
+
+    def get(self, session_id):
+        session = self.peek(session_id)
+        if session is not None:
+            return session
+
+        # Unknown here, or due for a re-check (it may have been closed)
+        doc = self.col.find_one({"_id": session_id})
+        if not doc or doc["expires_at"] <= datetime.utcnow():
+            self.drop_local(session_id)
+            return None
+        return self._remember(doc)
+
+    def drop_local(self, session_id):
+        with self._lock:
+            self._local.pop(session_id, None)
+
+    def close(self, session_id, teacher_id):
+        self.drop_local(session_id)
+        res = self.col.delete_one({"_id": session_id, "teacher_id": teacher_id})
+        return res.deleted_count > 0
+
+    def invalidate_exam(self, teacher_id, exam_code):
+        """A changed key makes open sessions for the exam stale."""
+        self.col.delete_many({"teacher_id": teacher_id, "exam_code": exam_code})
+        with self._lock:
+            for sid, (s, _) in list(self._local.items()):
+                if s["teacher_id"] == teacher_id and s["exam_code"] == exam_code:
+                    del self._local[sid]
+
+
+def check_sheet(session, teacher_id, usns, exam_code=""):
+    """
+    Returns (error, status) unless the caller (teacher_id from the JWT)
+    owns the session and every USN in usns belongs to it.
+    """
+    if session is None or not teacher_id:
+        return "Invalid or expired scan session", 401
+    if teacher_id != session["teacher_id"]:
+        return "Scan session belongs to another teacher", 403
+    if exam_code and exam_code != session["exam_code"]:
+        return "Scan session is for a different exam", 400
+    for usn in usns:
+        if usn not in session["usns"]:
+            return f"Student not in this scan session: {usn}", 404
+    return None, None
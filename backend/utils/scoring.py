@@ -0,0 +1,12 @@
+# backend/utils/scoring.py
+
+# =====================================================
+# ROWS THAT COUNT TOWARDS THE SCORE
+# =====================================================
+def keyed_rows(rows, answer_key):
+    """
+    The rows that are scored against answer_key: every row whose question
+    is in the key, duplicates included (a question read twice on a page is
+    scored twice). Used by grading and re-scoring alike.
+    """
+    return [r for r in rows if r.get("question_pred") in answer_key]
@@ -0,0 +1,360 @@
+# backend/utils/write_behind.py
+import atexit
+import os
+import threading
+import time
+import uuid
+from datetime import timezone
+
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from utils.exam_stats import rebuild_stats, record_result_changes
+
+# =====================================================
+# CONFIGURATION
+# =====================================================
+RESULT_WRITE_BEHIND = os.getenv("RESULT_WRITE_BEHIND", "0") == "1"
+RESULT_FLUSH_SIZE = int(os.getenv("RESULT_FLUSH_SIZE", "50"))
+RESULT_FLUSH_SECONDS = float(os.getenv("RESULT_FLUSH_SECONDS", "0.5"))
+# Failed writes are re-queued with exponential backoff (base .. cap
+# seconds) and only given up after this many attempts
+RESULT_FLUSH_MAX_ATTEMPTS = int(os.getenv("RESULT_FLUSH_MAX_ATTEMPTS", "10"))
+RESULT_RETRY_BASE_SECONDS = float(os.getenv("RESULT_RETRY_BASE_SECONDS", "0.5"))
+RESULT_RETRY_MAX_SECONDS = float(os.getenv("RESULT_RETRY_MAX_SECONDS", "30"))
+
+# Local token states are forgotten after this many entries
+MAX_TRACKED_TOKENS = 10000
+
+# What exam_stats needs from a document being replaced
+STATS_FIELDS = {
+    "usn": 1, "exam_code": 1, "teacher_id": 1, "write_id": 1, "score": 1,
+    "total": 1, "results.question_pred": 1, "results.result": 1
+}
+
+
+# =====================================================
+# WRITE-BEHIND BUFFER FOR RESULT UPSERTS
+# =====================================================
+class ResultWriteBehind:
+    """
+    Coalesces result upserts per (usn, exam_code) in this worker and
+    flushes them when RESULT_FLUSH_SIZE documents are waiting,
+    RESULT_FLUSH_SECONDS have passed, or the worker exits. A flush is one
+    $in read of the documents being replaced and one unordered
+    bulk_write; each replace is guarded by the replaced document's
+    write_id, so exam_stats only ever subtracts what was overwritten.
+    Documents whose write fails go back into the buffer and are retried
+    with backoff.
+
+    submit() returns an ack token; status() tells whether it is durable.
+    Each document carries its write_id so any worker can answer a poll.
+    """
+
+    def __init__(self, results_col, stats_col, max_batch=RESULT_FLUSH_SIZE,
+                 max_delay=RESULT_FLUSH_SECONDS, on_flush=None):
+        self.results_col = results_col
+        self.stats_col = stats_col
+        self.on_flush = on_flush   # called with the documents just written
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+
+        self._cond = threading.Condition()
+        self._pending = {}       # (usn, exam_code) -> document
+        self._oldest = None      # monotonic time of oldest pending doc
+        self._tokens = {}        # write_id -> pending/durable/superseded/failed
+        self._owners = {}        # write_id -> teacher_id
+        self._attempts = {}      # write_id -> failed writes so far
+        self._failures = 0       # consecutive failed flushes
+        self._retry_at = 0.0     # monotonic time the backoff ends
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+        self.metrics = {
+            "submitted": 0, "coalesced": 0, "flushes": 0, "flushed_docs": 0,
+            "failed_flushes": 0, "retried_docs": 0, "failed_docs": 0,
+            "stats_errors": 0, "on_flush_errors": 0,
+            "last_batch_size": 0, "max_batch_size": 0,
+            "last_flush_ms": 0.0, "max_flush_ms": 0.0, "total_flush_ms": 0.0,
+        }
+        atexit.register(self.flush)
+
+    # -------------------------------------------------
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="result-write-behind", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._due():
+                    timeout = None
+                    if self._oldest is not None:
+                        due_at = max(
+                            self._oldest + self.max_delay, self._retry_at
+                        )
+                        timeout = max(0.0, due_at - time.monotonic())
+                    self._cond.wait(timeout)
+            self.flush()
+
+    def _due(self):
+        if not self._pending:
+            return False
+        now = time.monotonic()
+        if now < self._retry_at:
+            return False  # backing off after a failed flush
+        if len(self._pending) >= self.max_batch:
+            return True
+        return now - self._oldest >= self.max_delay
+
+    # -------------------------------------------------
+    def submit(self, doc):
+        """Buffers a result document. Returns its ack token."""
+        self._ensure_started()
+        write_id = uuid.uuid4().hex
+        doc = {**doc, "write_id": write_id}
+        key = (doc["usn"], doc["exam_code"])
+
+        with self._cond:
+            previous = self._pending.get(key)
+            if previous is not None:
+                # A newer grade for the same sheet replaces the buffered one
+                self._tokens[previous["write_id"]] = "superseded"
+                self.metrics["coalesced"] += 1
+            self._pending[key] = doc
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._track(write_id, "pending")
+            self._owners[write_id] = doc.get("teacher_id")
+            self.metrics["submitted"] += 1
+            self._cond.notify()
+
+        submitted_ms = int(time.time() * 1000)
+        return f"{doc['usn']}:{doc['exam_code']}:{submitted_ms}:{write_id}"
+
+    def _track(self, write_id, state):
+        self._tokens[write_id] = state
+        if len(self._tokens) > MAX_TRACKED_TOKENS:
+            oldest = next(iter(self._tokens))
+            del self._tokens[oldest]
+            self._owners.pop(oldest, None)
+
+    def flush(self):
+        """Writes everything buffered so far. Returns documents written."""
+        with self._flush_lock:
+            with self._cond:
+                batch = list(self._pending.values())
+                self._pending = {}
+                self._oldest = None
+            if not batch:
+                return 0
+
+            start = time.perf_counter()
+            try:
+                written, failed, rebuild = self._write(batch)
+            except Exception as e:
+                print(f"Result write-behind flush failed: {e}")
+                written, failed, rebuild = [], batch, set()
+
+            if written:
+                try:
+                    record_result_changes(self.stats_col, [
+                        (prev, d) for prev, d in written
+                        if (d.get("teacher_id"), d["exam_code"]) not in rebuild
+                    ])
+                    for teacher_id, exam_code in rebuild:
+                        rebuild_stats(self.results_col, self.stats_col, {
+                            "teacher_id": teacher_id, "exam_code": exam_code
+                        })
+                except Exception as e:
+                    # The grades are stored; rebuild_exam_stats.py repairs this
+                    print(f"exam_stats update failed: {e}")
+                    self.metrics["stats_errors"] += 1
+            written = [d for _, d in written]
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._cond:
+                for d in written:
+                    self._attempts.pop(d["write_id"], None)
+                    if self._tokens.get(d["write_id"]) == "pending":
+                        self._track(d["write_id"], "durable")
+                self._requeue(failed)
+
+            # Outside the write path: a failure here must not mark
+            # already stored results as failed
+            if written and self.on_flush:
+                try:
+                    self.on_flush(written)
+                except Exception as e:
+                    print(f"Result write-behind on_flush failed: {e}")
+                    self.metrics["on_flush_errors"] += 1
+
+            m = self.metrics
+            m["flushes"] += 1
+            m["flushed_docs"] += len(written)
+            m["last_batch_size"] = len(batch)
+            m["max_batch_size"] = max(m["max_batch_size"], len(batch))
+            m["last_flush_ms"] = round(elapsed_ms, 2)
+            m["max_flush_ms"] = max(m["max_flush_ms"], m["last_flush_ms"])
+            m["total_flush_ms"] = round(m["total_flush_ms"] + elapsed_ms, 2)
+            return len(written)
+
+    def _write(self, batch):
+        """
+        One $in read of the documents being replaced, then one unordered
+        bulk_write. Returns (written, failed, rebuild): written holds
+        (previous, doc) pairs for exam_stats, failed the documents to
+        retry, rebuild the (teacher_id, exam_code) summaries to recompute.
+        """
+        keys = {(d["usn"], d["exam_code"]) for d in batch}
+        previous = {}
+        for doc in self.results_col.find(
+            {"usn": {"$in": sorted({k[0] for k in keys})},
+             "exam_code": {"$in": sorted({k[1] for k in keys})}},
+            STATS_FIELDS
+        ):
+            if (doc["usn"], doc["exam_code"]) in keys:
+                previous[(doc["usn"], doc["exam_code"])] = doc
+
+        ops, prevs = [], []
+        for d in batch:
+            prev = previous.get((d["usn"], d["exam_code"]))
+            prevs.append(prev)
+            if prev is None:
+                ops.append(ReplaceOne(
+                    {"usn": d["usn"], "exam_code": d["exam_code"]},
+                    d, upsert=True
+                ))
+            else:
+                # Replaces only the document read above: if another worker
+                # got there first this matches nothing and is retried, so
+                # exam_stats never subtracts a document twice
+                ops.append(ReplaceOne(
+                    {"_id": prev["_id"], "write_id": prev.get("write_id")},
+                    d
+                ))
+
+        try:
+            result = self.results_col.bulk_write(
+                ops, ordered=False
+            ).bulk_api_result
+        except BulkWriteError as e:
+            result = e.details
+
+        errored = {err["index"] for err in result.get("writeErrors", [])}
+        ok = [i for i in range(len(batch)) if i not in errored]
+        inserts = [i for i in ok if prevs[i] is None]
+        # An upsert that matched instead of inserting hit a sheet another
+        # worker inserted meanwhile; a guarded replace may have missed
+        collided = len(inserts) - result.get("nUpserted", 0)
+        replaced = result.get("nMatched", 0) - collided
+
+        landed = set(ok)
+        if collided > 0 or replaced < len(ok) - len(inserts):
+            ids = [batch[i]["write_id"] for i in ok]
+            stored = {doc["write_id"] for doc in self.results_col.find(
+                {"write_id": {"$in": ids}}, {"write_id": 1}
+            )}
+            landed = {i for i in ok if batch[i]["write_id"] in stored}
+
+        written = [(prevs[i], batch[i]) for i in sorted(landed)]
+        failed = [batch[i] for i in range(len(batch)) if i not in landed]
+        rebuild = set()
+        if collided > 0:
+            # Can't tell which upsert overwrote whose document
+            rebuild = {
+                (batch[i].get("teacher_id"), batch[i]["exam_code"])
+                for i in inserts if i in landed
+            }
+        return written, failed, rebuild
+
+    def _requeue(self, failed):
+        """Puts failed documents back with backoff. Caller holds _cond."""
+        if not failed:
+            self._failures = 0
+            self._retry_at = 0.0
+            return
+
+        self.metrics["failed_flushes"] += 1
+        self._failures += 1
+        now = time.monotonic()
+        self._retry_at = now + min(
+            RESULT_RETRY_MAX_SECONDS,
+            RESULT_RETRY_BASE_SECONDS * 2 ** (self._failures - 1)
+        )
+
+        for d in failed:
+            write_id = d["write_id"]
+            key = (d["usn"], d["exam_code"])
+            attempts = self._attempts.get(write_id, 0) + 1
+
+            if key in self._pending:
+                # A newer grade for the sheet arrived meanwhile
+                self._attempts.pop(write_id, None)
+                self._track(write_id, "superseded")
+            elif attempts >= RESULT_FLUSH_MAX_ATTEMPTS:
+                print(f"Giving up on result {key} after {attempts} attempts")
+                self._attempts.pop(write_id, None)
+                self._track(write_id, "failed")
+                self.metrics["failed_docs"] += 1
+            else:
+                self._attempts[write_id] = attempts
+                self._pending[key] = d
+                self.metrics["retried_docs"] += 1
+
+        if self._pending and self._oldest is None:
+            self._oldest = now
+        self._cond.notify()
+
+    # -------------------------------------------------
+    def status(self, token, teacher_id):
+        """
+        pending | durable | superseded | failed | unknown. Only results
+        of teacher_id are reported; anyone else's token is "unknown".
+        """
+        try:
+            usn, exam_code, submitted_ms, write_id = token.rsplit(":", 3)
+            submitted_ms = int(submitted_ms)
+        except ValueError:
+            return "unknown"
+
+        with self._cond:
+            local = self._tokens.get(write_id)
+            owner = self._owners.get(write_id)
+        if local is not None:
+            return local if owner == teacher_id else "unknown"
+
+        # Token from another worker (or one we already forgot)
+        doc = self.results_col.find_one(
+            {"usn": usn, "exam_code": exam_code, "teacher_id": teacher_id},
+            {"write_id": 1, "timestamp": 1}
+        )
+        if doc is not None and doc.get("write_id") == write_id:
+            return "durable"
+
+        # A newer grade already stored means this one was replaced.
+        # Otherwise it is not ours: maybe buffered in another worker,
+        # maybe lost with a crashed one, so don't claim "pending"
+        stored = doc.get("timestamp") if doc else None
+        if stored is not None:
+            stored_ms = stored.replace(tzinfo=timezone.utc).timestamp() * 1000
+            if stored_ms >= submitted_ms:
+                return "superseded"
+        return "unknown"
+
+    def stats(self):
+        m = dict(self.metrics)
+        m["pending"] = len(self._pending)
+        m["avg_batch_size"] = (
+            round(m["flushed_docs"] / m["flushes"], 2) if m["flushes"] else 0
+        )
+        m["avg_flush_ms"] = (
+            round(m["total_flush_ms"] / m["flushes"], 2) if m["flushes"] else 0
+        )
+        return m